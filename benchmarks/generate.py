@@ -0,0 +1,138 @@
+# Synthetic tickets at any scale, for load testing. Rows come out either as CSVs
+# in the messy Assets export format (words split on commas, stray quotes, "In
+# Progress" spilling over two columns, the odd padded field or junk line) or
+# straight into the ticket tables through database.ingest. The same seed always
+# gives the same data.
+#
+#     python -m benchmarks.generate csv --rows 100000 --out /tmp/tickets
+#     python -m benchmarks.generate db --rows 100000     # into APP_DB_PATH / app.db
+import os
+import random
+from datetime import date, timedelta
+
+import database.db as db
+from database import ingest
+
+# Per department: the CSV file name, the category, the ticket number the IDs
+# start from (as in Assets/) and the issue types raised there.
+DEPARTMENTS = {
+    "IT": ("IT.csv", "IT Operations", 3000,
+           ("Server Failure", "Network Down", "VPN Access", "Hardware", "Software")),
+    "CYBER": ("Cybersec.csv", "Cybersecurity", 4000,
+              ("Malware", "Phishing", "Ransomware", "DDoS", "Trojan")),
+    "DATASCI": ("DataSci.csv", "Data Science", 2000,
+                ("Analytics", "Data Cleaning", "Model Training", "Visualization", "Dataset")),
+}
+
+PRIORITIES = (("Low", 30), ("Medium", 35), ("High", 25), ("Critical", 10))
+STATUSES = (("Open", 35), ("In Progress", 25), ("Resolved", 30), ("Closed", 10))
+OTHER_SHARE = 0.08  # descriptions that start with no known issue type
+
+SUBJECTS = ("Production API gateway", "Wifi signal", "Shared drive", "Customer database", "Payroll export",
+            "Build server", "Laptop battery", "Email filter", "Nightly ETL job", "Dashboard refresh",
+            "Remote desktop", "Firewall rule", "Backup snapshot", "Feature store", "Printer queue")
+PROBLEMS = ("down", "failing intermittently", "weak", "not responding", "reported by HR", "slow since update",
+            "flagged by monitoring", "returning errors", "timing out", "needs review", "blocked", "degraded")
+PLACES = ("in conference room B", "for the finance team", "on macOS devices", "after the last deploy",
+          "from remote IP", "in the EU region", "on shared laptops", "since Monday", "", "", "")
+
+START_DATE = date(2023, 1, 1)
+SPAN_DAYS = 730
+
+HEADER = "ticket_id,date,category,issue_type,description,priority,status"
+
+
+def _cum(weights):
+    total, out = 0, []
+    for _, w in weights:
+        total += w
+        out.append(total)
+    return [label for label, _ in weights], out
+
+
+def generate(dept: str, rows: int, seed: int = 0, start: date = START_DATE, span_days: int = SPAN_DAYS):
+    """
+    Yields `rows` clean tickets for one department (see DEPARTMENTS) as dicts with
+    the columns of a ticket table plus `category`, oldest first.
+    """
+    _, category, first_id, issues = DEPARTMENTS[dept]
+    rng = random.Random(f"{seed}:{dept}")
+    priorities, prio_cum = _cum(PRIORITIES)
+    statuses, status_cum = _cum(STATUSES)
+    dates = [(start + timedelta(days=d)).isoformat() for d in range(span_days)]
+
+    for i in range(rows):
+        issue = "Other" if rng.random() < OTHER_SHARE else rng.choice(issues)
+        description = " ".join(filter(None, (rng.choice(SUBJECTS), rng.choice(PROBLEMS), rng.choice(PLACES))))
+        yield {
+            "ticket_id": f"TICK-{first_id + 1 + i}",
+            "date": dates[i * span_days // rows],
+            "category": category,
+            "issue_type": issue,
+            "description": description,
+            "priority": rng.choices(priorities, cum_weights=prio_cum)[0],
+            "status": rng.choices(statuses, cum_weights=status_cum)[0],
+        }
+
+
+def messy_line(row: dict, rng: random.Random) -> str:
+    """One row as the Assets export writes it."""
+    issue = "" if row["issue_type"] == "Other" else row["issue_type"]
+    text = " ".join(filter(None, (row["category"], issue, row["description"], row["priority"], row["status"])))
+    tokens = [row["ticket_id"], row["date"]] + text.split(" ")
+
+    if rng.random() < 0.02:
+        # A padded word in the description; the parsers strip it.
+        i = rng.randrange(3, len(tokens) - 3)
+        tokens[i] = f" {tokens[i]} "
+    if rng.random() < 0.7:
+        # Quotes around the head and the tail of the line, wherever they land.
+        cut = rng.randrange(3, len(tokens) - 2)
+        tail = rng.randrange(cut + 1, len(tokens))
+        return f'"{",".join(tokens[:cut])}",{",".join(tokens[cut:tail])},"{",".join(tokens[tail:])}"'
+    return ",".join(tokens)
+
+
+def write_csvs(out_dir: str, rows: int, seed: int = 0, junk_share: float = 0.001) -> dict:
+    """Writes `rows` tickets per department in the Assets format; returns {key: path} like db.FILES."""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    files = {}
+    for dept, (fname, *_) in DEPARTMENTS.items():
+        path = os.path.join(out_dir, fname)
+        with open(path, "w", newline="") as f:
+            f.write(HEADER + "\n")
+            for row in generate(dept, rows, seed):
+                if rng.random() < junk_share:
+                    f.write(rng.choice(("", "n/a", ",,,")) + "\n")
+                f.write(messy_line(row, rng) + "\n")
+        files[dept] = path
+    return files
+
+
+def insert(conn, rows: int, seed: int = 0, progress=None) -> ingest.IngestStats:
+    """Inserts `rows` clean tickets per department through the bulk ingest path."""
+    def all_rows():
+        for dept in DEPARTMENTS:
+            yield from generate(dept, rows, seed)
+    return ingest.ingest_rows(conn, all_rows(), progress=progress)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Generate synthetic tickets.")
+    arg_parser.add_argument("target", choices=("csv", "db"), help="Write Assets-format CSVs or insert into the database.")
+    arg_parser.add_argument("--rows", type=int, default=10_000, help="Tickets per department.")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--out", default="generated", help="Output directory for csv.")
+    args = arg_parser.parse_args()
+
+    if args.target == "csv":
+        for key, path in write_csvs(args.out, args.rows, args.seed).items():
+            print(f"{key}: {path}")
+    else:
+        db.ensure_db()
+        conn = db.get_connection()
+        print(f"Inserted {insert(conn, args.rows, args.seed)} into {db.DB_PATH}")
+        conn.close()
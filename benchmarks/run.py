@@ -0,0 +1,254 @@
+# Benchmark suite: generates tickets at one or more scales and times ingestion,
+# CRUD, dashboard aggregation and page rendering (Streamlit's AppTest) against a
+# throwaway database. Each scale runs in its own process, so caches start cold
+# and the real app.db is never touched. Results are written as JSON and compared
+# with a saved baseline; a regression beyond the tolerance fails the run.
+#
+#     python -m benchmarks.run --rows 10000 100000      # tickets per department
+#     python -m benchmarks.run --save-baseline          # accept the results as the new baseline
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(PROJECT_ROOT, "benchmarks")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+DEFAULT_ROWS = 10_000
+CRUD_OPS = 200
+QUERY_REPEATS = 20
+PAGE_RUNS = 5
+PAGE_TIMEOUT = 600
+TOLERANCE = 0.25   # relative slowdown that counts as a regression
+NOISE_MS = 1.0     # differences below this are never regressions
+
+PAGES = ("main.py", "pages/1_Cybsec.py", "pages/2_Datasci.py", "pages/3_IT.py")
+
+
+def percentiles(samples: list) -> dict:
+    """p50/p95 of timings in seconds, reported in milliseconds."""
+    from services.instrumentation import percentile
+
+    ordered = sorted(samples)
+    return {"p50": percentile(ordered, 50) * 1000, "p95": percentile(ordered, 95) * 1000}
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+class Recorder:
+    """Collects metrics as {name: {"value", "unit", "better"}}."""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, name: str, value: float, unit: str = "ms", better: str | None = "lower"):
+        self.metrics[name] = {"value": round(value, 3), "unit": unit, "better": better}
+        print(f"  {name:<45} {value:>12,.2f} {unit}")
+
+    def add_timings(self, name: str, samples: list):
+        for stat, value in percentiles(samples).items():
+            self.add(f"{name}.{stat}", value)
+
+
+def bench_ingest(rec: Recorder, workdir: str, rows: int, seed: int):
+    import database.db as db
+    from benchmarks import generate
+
+    seconds, files = timed(generate.write_csvs, os.path.join(workdir, "csv"), rows, seed)
+    rec.add("generate.csv", seconds * 1000, better=None)
+
+    seconds, counts = timed(db.init_db, force_reset=True, files=files)
+    rec.add("ingest.init_db", seconds * 1000)
+    rec.add("ingest.rows_per_sec", sum(counts.values()) / seconds, unit="rows/s", better="higher")
+    rec.add("ingest.tickets", sum(counts.values()), unit="rows", better=None)
+
+    # Re-seeding unchanged files should only hash them.
+    seconds, _ = timed(db.init_db, files=files)
+    rec.add("ingest.reseed_unchanged", seconds * 1000)
+
+
+def bench_crud(rec: Recorder, ops: int):
+    import database.db as db
+
+    table = "it_tickets"
+    add, fetch, update, delete = [], [], [], []
+    for i in range(ops):
+        seconds, tid = timed(db.add_entry, table, "Hardware", f"Benchmark ticket {i}", "Low", "Open")
+        add.append(seconds)
+        fetch.append(timed(db.fetch_by_id, table, tid)[0])
+        update.append(timed(db.update_entry, table, tid, "Software", f"Benchmark ticket {i}", "High", "Resolved")[0])
+        delete.append(timed(db.delete_entry, table, tid)[0])
+    rec.add_timings("crud.add", add)
+    rec.add_timings("crud.fetch_by_id", fetch)
+    rec.add_timings("crud.update", update)
+    rec.add_timings("crud.delete", delete)
+
+
+def bench_aggregation(rec: Recorder, repeats: int):
+    import database.db as db
+    from database import aggregates
+
+    queries = {
+        "fetch_all": lambda: db.fetch_all("it_tickets"),
+        "fetch_unified": db.fetch_unified,
+        "table_counts": lambda: aggregates.table_counts("it_tickets"),
+        "unified_counts": lambda: aggregates.unified_counts(("priority", "status")),
+        "count_tickets": lambda: db.count_tickets("it_tickets", status="Resolved"),
+        "weekly_counts": lambda: db.weekly_counts("it_tickets"),
+        "fetch_page": lambda: db.fetch_page("it_tickets", status=["Open"]),
+        "search": lambda: db.search("server down"),
+    }
+    for name, query in queries.items():
+        cold, warm = [], []
+        for _ in range(repeats):
+            db.cache.invalidate()
+            cold.append(timed(query)[0])
+            warm.append(timed(query)[0])
+        rec.add_timings(f"agg.{name}.cold", cold)
+        rec.add_timings(f"agg.{name}.warm", warm)
+
+
+def bench_pages(rec: Recorder, runs: int):
+    from streamlit.testing.v1 import AppTest
+
+    import database.db as db
+    from models.user import User
+
+    for page in PAGES:
+        name = os.path.splitext(os.path.basename(page))[0]
+        at = AppTest.from_file(os.path.join(PROJECT_ROOT, page), default_timeout=PAGE_TIMEOUT)
+        at.session_state["user"] = User("admin", "0000", "admin")
+
+        db.cache.invalidate()
+        seconds, _ = timed(at.run)
+        if at.exception:
+            raise RuntimeError(f"{page} failed: {at.exception}")
+        rec.add(f"page.{name}.first", seconds * 1000)
+        rec.add_timings(f"page.{name}.rerun", [timed(at.run)[0] for _ in range(runs)])
+
+
+def run_scale(workdir: str, rows: int, seed: int, quick: bool) -> dict:
+    """Runs every benchmark at one scale. Expects APP_DB_PATH to point into `workdir`."""
+    rec = Recorder()
+    print(f"--- {rows:,} tickets per department ---")
+    bench_ingest(rec, workdir, rows, seed)
+    bench_crud(rec, CRUD_OPS // 10 if quick else CRUD_OPS)
+    bench_aggregation(rec, QUERY_REPEATS // 4 if quick else QUERY_REPEATS)
+    bench_pages(rec, 1 if quick else PAGE_RUNS)
+    return rec.metrics
+
+
+def compare(current: dict, baseline: dict, tolerance: float = TOLERANCE) -> list:
+    """Metrics that got worse than the baseline by more than `tolerance`, as printable lines."""
+    regressions = []
+    for scale, metrics in current["results"].items():
+        for name, m in metrics.items():
+            old = baseline.get("results", {}).get(scale, {}).get(name)
+            if old is None or m["better"] is None or not old["value"]:
+                continue
+            change = (m["value"] - old["value"]) / old["value"]
+            worse = change > tolerance if m["better"] == "lower" else change < -tolerance
+            if m["unit"] == "ms" and abs(m["value"] - old["value"]) < NOISE_MS:
+                worse = False
+            if worse:
+                regressions.append(f"{scale:>10} {name:<45} {old['value']:>12,.2f} -> {m['value']:>12,.2f} {m['unit']} ({change:+.0%})")
+    return regressions
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Benchmark ingestion, CRUD, aggregation and pages.")
+    arg_parser.add_argument("--rows", type=int, nargs="+", default=[DEFAULT_ROWS], help="Tickets per department, one run per value.")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--quick", action="store_true", help="Fewer repetitions, for a smoke run.")
+    arg_parser.add_argument("--out", help="Results file (default: benchmarks/results/<timestamp>.json).")
+    arg_parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline to compare against.")
+    arg_parser.add_argument("--save-baseline", action="store_true", help="Write the results to the baseline too.")
+    arg_parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    arg_parser.add_argument("--keep", action="store_true", help="Keep the generated data and databases.")
+    arg_parser.add_argument("--scale-out", help=argparse.SUPPRESS)  # set for the per-scale child process
+    args = arg_parser.parse_args()
+
+    if args.scale_out:
+        results = run_scale(os.path.dirname(os.environ["APP_DB_PATH"]), args.rows[0], args.seed, args.quick)
+        with open(args.scale_out, "w") as f:
+            json.dump(results, f)
+        return 0
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seed": args.seed,
+            "quick": args.quick,
+        },
+        "results": {},
+    }
+    root = tempfile.mkdtemp(prefix="bench-")
+    try:
+        for rows in args.rows:
+            workdir = os.path.join(root, str(rows))
+            os.makedirs(workdir)
+            scale_out = os.path.join(workdir, "results.json")
+            cmd = [sys.executable, "-m", "benchmarks.run", "--rows", str(rows), "--seed", str(args.seed), "--scale-out", scale_out]
+            if args.quick:
+                cmd.append("--quick")
+            env = dict(os.environ, APP_DB_PATH=os.path.join(workdir, "app.db"))
+            if subprocess.run(cmd, cwd=PROJECT_ROOT, env=env).returncode != 0:
+                print(f"[ERROR] Benchmark at {rows:,} rows failed")
+                return 2
+            with open(scale_out) as f:
+                report["results"][str(rows)] = json.load(f)
+    finally:
+        if args.keep:
+            print(f"Generated data kept in {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+    out = args.out or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {out}")
+
+    status = 0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.baseline}:")
+            print("\n".join(regressions))
+            status = 1
+        else:
+            print(f"No regressions against {args.baseline}.")
+    if args.save_baseline:
+        shutil.copyfile(out, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import pandas as pd
+import database.db as db
+from database import analytics, archive
+
+# Dashboard label -> ticket table.
+DEPARTMENTS = {
+    "Cyber Security": "security_incidents",
+    "IT Operations": "it_tickets",
+    "Data Analysis": "data_science_projects"
+}
+
+
+def rollup(df: pd.DataFrame, by) -> pd.DataFrame:
+    """Re-groups an already aggregated count table by fewer columns."""
+    by = [by] if isinstance(by, str) else list(by)
+    if df.empty:
+        return pd.DataFrame(columns=by + ["count"])
+    return df.groupby(by, as_index=False)["count"].sum()
+
+
+def total(df: pd.DataFrame, **filters) -> int:
+    """Sum of `count` over the rows matching every filter (a value or a list of values)."""
+    if df.empty:
+        return 0
+    mask = pd.Series(True, index=df.index)
+    for col, value in filters.items():
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        mask &= df[col].isin(values)
+    return int(df.loc[mask, "count"].sum())
+
+
+def _counts(table_name: str, by) -> pd.DataFrame:
+    # Groupings covered by ticket_counters cost O(groups) in SQLite; anything
+    # else is a scan, which the DuckDB backend (if enabled) runs vectorized.
+    if set(by) <= set(db.COUNTER_COLUMNS):
+        return db.count_by(table_name, by)
+    return analytics.counts(table_name, by)
+
+
+def _with_history(hot: pd.DataFrame, table_name: str, by) -> pd.DataFrame:
+    cold = archive.cold_counts(table_name, by)
+    if cold.empty:
+        return hot
+    return rollup(pd.concat([hot, cold], ignore_index=True), by)
+
+
+def table_counts(table_name: str, by=("issue_type", "priority", "status"), history: bool = False) -> pd.DataFrame:
+    """Counts for one ticket table, grouped in SQL; with history, archived tickets are added in."""
+    by = list(by)
+    if history and analytics.enabled():
+        return analytics.history_counts(table_name, by)
+    counts = _counts(table_name, by)
+    return _with_history(counts, table_name, by) if history else counts
+
+
+def unified_counts(by=("priority", "status"), history: bool = False) -> pd.DataFrame:
+    """
+    Counts across all departments with a `Department` column, the aggregated
+    equivalent of db.fetch_unified(). Counter groupings are one query on
+    ticket_counters; priority and status are title-cased once per cache fill.
+    With history, each department's archived tickets are counted as well.
+    """
+    by = list(by)
+
+    def build():
+        if history:
+            frames = []
+            for dept, table in DEPARTMENTS.items():
+                df = table_counts(table, by, history=True)
+                if not df.empty:
+                    frames.append(df.assign(Department=dept))
+            df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        elif set(by) <= set(db.COUNTER_COLUMNS):
+            df = db.count_by_department(by)
+        else:
+            frames = []
+            for dept, table in DEPARTMENTS.items():
+                df = _counts(table, by)
+                if not df.empty:
+                    frames.append(df.assign(Department=dept))
+            df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        if df.empty:
+            return pd.DataFrame(columns=["Department"] + by + ["count"])
+
+        for col in ("priority", "status"):
+            if col in by:
+                df[col] = df[col].str.title()
+        return rollup(df, ["Department"] + by)
+
+    # Cached under the "tickets" version, like archive.read_cold.
+    return db.cache.get("tickets", ("unified_counts", tuple(by), history), build)
@@ -0,0 +1,104 @@
+# Optional DuckDB engine for the dashboard group-bys that ticket_counters can't
+# answer, and for counts over the full history (hot tables plus the Parquet
+# archive), enabled with ANALYTICS_BACKEND=duckdb when the duckdb package is
+# installed; see database/aggregates.py for the routing. CRUD always stays on
+# SQLite. DuckDB reads app.db live through its sqlite extension; where that can't
+# be loaded (e.g. offline), the backend turns itself off and the SQLite
+# aggregates are used, since copying tables over on every write would be slower.
+import os
+import threading
+
+import pandas as pd
+
+import database.db as db
+from database import archive
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+BACKEND = os.environ.get("ANALYTICS_BACKEND", "sqlite").lower()
+
+_conn = None
+_unavailable = False
+_connect_lock = threading.Lock()
+_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    """True when DuckDB is selected, installed and can attach app.db."""
+    return BACKEND == "duckdb" and duckdb is not None and _connect() is not None
+
+
+def _literal(text: str) -> str:
+    return "'" + text.replace("'", "''") + "'"
+
+
+def _connect():
+    global _conn, _unavailable
+    with _connect_lock:
+        if _conn is None and not _unavailable:
+            db.ensure_db()
+            conn = duckdb.connect()
+            try:
+                conn.execute("LOAD sqlite")
+                conn.execute(f"ATTACH {_literal(db.DB_PATH)} AS app (TYPE sqlite, READ_ONLY)")
+                _conn = conn
+            except Exception as e:
+                conn.close()
+                _unavailable = True
+                print(f"[WARNING] DuckDB can't attach the database ({str(e).splitlines()[0]}); using the SQLite aggregates instead.")
+        return _conn
+
+
+def _source(table_name: str) -> str:
+    """Name to query for a ticket table."""
+    if table_name not in db.MODULE_TABLES.values():
+        raise ValueError(f"Unknown ticket table {table_name!r}")
+    return f"app.{table_name}"
+
+
+def _columns(by) -> list:
+    by = list(by)
+    for col in by:
+        if col not in db.GROUPABLE_COLUMNS:
+            raise ValueError(f"Cannot group by {col!r}")
+    return by
+
+
+def query(table_name: str, sql: str, params=()) -> pd.DataFrame:
+    """Runs `sql` on DuckDB with {table} replaced by the table's source."""
+    with _lock:  # one DuckDB connection; queries are short group-bys
+        return _connect().execute(sql.replace("{table}", _source(table_name)), list(params)).df()
+
+
+def counts(table_name: str, by) -> pd.DataFrame:
+    """Row counts grouped by `by`, like db.count_by."""
+    by = _columns(by)
+    if not enabled():
+        return db.count_by(table_name, by)
+    cols = ", ".join(by)
+    sql = f"SELECT {cols}, count(*) AS count FROM {{table}} GROUP BY {cols}"
+    return db.cache.get(table_name, ("duckdb_counts", tuple(by)), lambda: query(table_name, sql))
+
+
+def history_counts(table_name: str, by) -> pd.DataFrame:
+    """
+    Hot and archived row counts grouped by `by`, like aggregates.table_counts with
+    history, in one DuckDB scan that reads the Parquet archive in place.
+    """
+    by = _columns(by)
+    files = archive.archived_files(table_name) if archive.available() else []
+    if not files:
+        return counts(table_name, by)
+    cols = ", ".join(by)
+    sql = f"""
+        SELECT {cols}, count(*) AS count FROM (
+            SELECT {cols} FROM {{table}}
+            UNION ALL
+            SELECT {cols} FROM read_parquet([{", ".join(_literal(path) for path in files)}])
+        ) GROUP BY {cols}
+    """
+    # Cached under the hot table's version, like archive.read_cold.
+    return db.cache.get(table_name, ("duckdb_history", tuple(by), len(files)), lambda: query(table_name, sql))
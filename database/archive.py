@@ -0,0 +1,153 @@
+# Hot/cold tiering. Resolved and Closed tickets older than a cutoff move out of
+# SQLite into Parquet files per department, partitioned by the ticket's month:
+#
+#     database/archive/<table>/year=2024/month=03/part-<timestamp>.parquet
+#
+# A file counts as archived only once it is listed in archive_files, which is
+# written in the same transaction that selects and deletes its rows from the hot
+# tables; an interrupted run leaves an unlisted file behind, and readers ignore it.
+# The same transaction records each ticket in archived_tickets, which ingestion
+# checks, so reseeding or tailing the CSVs never puts an archived ticket back.
+#
+# Results that include archived rows are cached under the hot table's version
+# (db.table_versions): the cold set only grows in a run that deletes hot rows,
+# and that delete bumps the version, so such entries expire exactly when it grows.
+#
+#     python -m database.archive --days 180 [--dry-run]
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import database.db as db
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+ARCHIVE_DIR = os.path.join(db.BASE_DIR, "archive")
+ARCHIVED_STATUSES = ("Resolved", "Closed")
+ARCHIVE_AFTER_DAYS = 180
+COLUMNS = ["ticket_id", "date", "issue_type", "description", "priority", "status"]
+
+
+def available() -> bool:
+    return pq is not None
+
+
+def _partition(date) -> str:
+    if isinstance(date, str) and len(date) >= 7 and date[:4].isdigit() and date[5:7].isdigit():
+        return f"year={date[:4]}/month={date[5:7]}"
+    return "year=unknown/month=unknown"
+
+
+def archive_tickets(older_than_days: int = ARCHIVE_AFTER_DAYS, cutoff: str | None = None, dry_run: bool = False) -> dict:
+    """
+    Moves Resolved/Closed tickets dated before `cutoff` (default: `older_than_days`
+    ago) from each department's table into its Parquet archive. Returns the number
+    of tickets moved (or that would be, with dry_run) per table.
+    """
+    if not available():
+        raise RuntimeError("Archiving needs pyarrow: pip install pyarrow")
+    cutoff = cutoff or (datetime.now() - timedelta(days=older_than_days)).strftime("%Y-%m-%d")
+    stamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
+    moved = {}
+
+    for table in db.MODULE_TABLES.values():
+        sql = f"""
+            SELECT {", ".join(COLUMNS)} FROM {table}
+            WHERE status IN ({", ".join("?" * len(ARCHIVED_STATUSES))}) AND date < ?
+        """
+        if dry_run:
+            moved[table] = len(db.read_sql(sql, (*ARCHIVED_STATUSES, cutoff)))
+            continue
+
+        with db.connection() as conn:
+            # The write lock is taken before reading, so a ticket reopened or
+            # edited meanwhile can't be archived in its old state and deleted.
+            conn.execute("BEGIN IMMEDIATE")
+            df = pd.read_sql(sql, conn, params=(*ARCHIVED_STATUSES, cutoff))
+            moved[table] = len(df)
+            if df.empty:
+                conn.rollback()
+                continue
+
+            written = []
+            for partition, part in df.groupby(df["date"].map(_partition), sort=True):
+                directory = os.path.join(ARCHIVE_DIR, table, partition)
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, f"part-{stamp}.parquet")
+                pq.write_table(pa.Table.from_pandas(part[COLUMNS], preserve_index=False), path)
+                written.append((os.path.relpath(path, ARCHIVE_DIR), partition, part))
+
+            # Rows leave SQLite and the files become visible in one transaction.
+            dt = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            for path, partition, part in written:
+                conn.executemany(f"DELETE FROM {table} WHERE ticket_id = ?", [(tid,) for tid in part["ticket_id"]])
+                conn.executemany(
+                    "INSERT OR IGNORE INTO archived_tickets SELECT id, ? FROM departments WHERE tbl = ?",
+                    [(tid, table) for tid in part["ticket_id"]]
+                )
+                conn.execute(
+                    "INSERT INTO archive_files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (path, table, partition, len(part), part["date"].min(), part["date"].max(), dt)
+                )
+            conn.commit()
+        db.cache.invalidate(table)
+
+    return moved
+
+
+def archived_files(table_name: str) -> list:
+    """Paths of the committed archive files for a table."""
+    with db.connection() as conn:
+        rows = conn.execute("SELECT path FROM archive_files WHERE tbl = ? ORDER BY path", (table_name,)).fetchall()
+    return [os.path.join(ARCHIVE_DIR, path) for (path,) in rows]
+
+
+def read_cold(table_name: str, columns=None) -> pd.DataFrame:
+    """The archived tickets of one table (only `columns`, if given)."""
+    columns = list(columns or COLUMNS)
+    files = archived_files(table_name) if available() else []
+    if not files:
+        return pd.DataFrame(columns=columns)
+
+    def load():
+        return pd.concat([pq.read_table(path, columns=columns).to_pandas() for path in files], ignore_index=True)
+
+    # Cached under the hot table's version; see the note at the top.
+    return db.cache.get(table_name, ("cold", tuple(columns), len(files)), load)
+
+
+def cold_counts(table_name: str, by) -> pd.DataFrame:
+    """Archived ticket counts grouped by `by`, shaped like db.count_by."""
+    by = list(by)
+    df = read_cold(table_name, by)
+    if df.empty:
+        return pd.DataFrame(columns=by + ["count"])
+    return df.groupby(by, as_index=False, dropna=False).size().rename(columns={"size": "count"})
+
+
+def fetch_history(table_name: str) -> pd.DataFrame:
+    """Hot and cold tickets of one table together, like db.fetch_all over the full history."""
+    hot, cold = db.fetch_all(table_name), read_cold(table_name)
+    if cold.empty:
+        return hot
+    return pd.concat([hot, cold], ignore_index=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Move old Resolved/Closed tickets to Parquet.")
+    arg_parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS, help="Archive tickets older than this.")
+    arg_parser.add_argument("--cutoff", help="Archive tickets dated before this YYYY-MM-DD instead.")
+    arg_parser.add_argument("--dry-run", action="store_true", help="Only report what would move.")
+    args = arg_parser.parse_args()
+
+    moved = archive_tickets(args.days, args.cutoff, args.dry_run)
+    verb = "Would archive" if args.dry_run else "Archived"
+    for table, n in moved.items():
+        print(f"{verb} {n} ticket(s) from {table}")
@@ -0,0 +1,110 @@
+import sys
+import threading
+from collections import OrderedDict
+
+
+def estimate_size(value) -> int:
+    """Approximate memory footprint of a cached result, in bytes."""
+    if hasattr(value, "memory_usage"):  # pandas DataFrame
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+def _share(value):
+    # Callers get a shallow copy so adding or replacing columns never touches the cached frame.
+    if hasattr(value, "copy") and hasattr(value, "memory_usage"):
+        return value.copy(deep=False)
+    return value
+
+
+class QueryCache:
+    """
+    Process-wide LRU cache of query results, shared by every session.
+
+    Entries are keyed by (table, key) and bounded by estimated memory. A write
+    through the db helpers invalidates its table; `version_check` returns a
+    {table: version} mapping and catches writes made anywhere else.
+    """
+
+    def __init__(self, max_bytes: int, version_check=None):
+        self._max_bytes = max_bytes
+        self._version_check = version_check
+        self._versions: dict = {}
+        self._entries: OrderedDict = OrderedDict()
+        self._generations: dict = {}
+        self._loading: dict = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, table: str, key, loader):
+        """Returns the cached result for (table, key), calling loader() once on a miss."""
+        self._check_version()
+        entry_key = (table, key)
+
+        with self._lock:
+            if entry_key in self._entries:
+                self._entries.move_to_end(entry_key)
+                self.hits += 1
+                return _share(self._entries[entry_key][0])
+            key_lock = self._loading.setdefault(entry_key, threading.Lock())
+
+        # Concurrent misses on the same key wait for one loader instead of all querying.
+        with key_lock:
+            with self._lock:
+                if entry_key in self._entries:
+                    self.hits += 1
+                    return _share(self._entries[entry_key][0])
+                generation = self._generations.get(table, 0)
+                self.misses += 1
+
+            try:
+                value = loader()
+                self._store(entry_key, value, generation)
+            finally:
+                with self._lock:
+                    self._loading.pop(entry_key, None)
+        return _share(value)
+
+    def _store(self, entry_key, value, generation):
+        size = estimate_size(value)
+        with self._lock:
+            # A write landed while we were loading; the result may already be stale.
+            if self._generations.get(entry_key[0], 0) != generation or size > self._max_bytes:
+                return
+            if entry_key in self._entries:
+                self._bytes -= self._entries.pop(entry_key)[1]
+            self._entries[entry_key] = (value, size)
+            self._bytes += size
+            while self._bytes > self._max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def invalidate(self, table: str | None = None) -> None:
+        """Drops every entry for `table`, or everything when table is None."""
+        with self._lock:
+            tables = [table] if table else {k[0] for k in self._entries} | set(self._generations)
+            for t in tables:
+                self._generations[t] = self._generations.get(t, 0) + 1
+            for entry_key in [k for k in self._entries if table is None or k[0] == table]:
+                self._bytes -= self._entries.pop(entry_key)[1]
+
+    def _check_version(self) -> None:
+        if self._version_check is None:
+            return
+        versions = self._version_check()
+        if versions == self._versions:
+            return
+        for table, version in versions.items():
+            if table in self._versions and self._versions[table] != version:
+                self.invalidate(table)
+        self._versions = dict(versions)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,117 @@
+import queue
+import threading
+import time
+
+BATCH_SIZE = 50
+FLUSH_INTERVAL = 1.0   # seconds a message may wait before it is written
+MAX_PENDING = 10000    # rows kept for retry while the database is unavailable
+
+
+class _Marker:
+    """Queued behind the rows it covers; `ok` tells the waiter whether they were committed."""
+
+    def __init__(self, discard=None):
+        self.discard = discard
+        self.ok = False
+        self.done = threading.Event()
+
+    def wait(self, timeout: float) -> bool:
+        return self.done.wait(timeout) and self.ok
+
+
+class ChatLogWriter:
+    """
+    Write-behind queue for chat_logs rows.
+
+    write() only enqueues; a background thread commits the queued rows in one
+    transaction once `batch_size` rows are waiting or `flush_interval` has
+    passed. flush() blocks until everything queued so far is on disk, so reads
+    and deletes of chat history stay consistent with what was written; it
+    returns False if those rows are still waiting for a retry.
+    """
+
+    def __init__(self, write_batch, batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        self._write_batch = write_batch
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="chat-log-writer", daemon=True)
+                self._thread.start()
+
+    def write(self, row: tuple):
+        self._ensure_started()
+        self._queue.put(row)
+
+    def _alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Waits until every row queued before this call is committed. False on timeout or a failed write."""
+        if not self._alive():  # never started, or closed
+            return self._queue.empty()
+        marker = _Marker()
+        self._queue.put(marker)
+        return marker.wait(timeout)
+
+    def discard(self, predicate, timeout: float = 10.0) -> bool:
+        """Drops the queued rows matching `predicate` (e.g. a conversation being deleted), then flushes the rest."""
+        if not self._alive():
+            return self._queue.empty()
+        marker = _Marker(discard=predicate)
+        self._queue.put(marker)
+        return marker.wait(timeout)
+
+    def close(self, timeout: float = 10.0):
+        """Flushes and stops the writer thread (registered with atexit)."""
+        if not self._alive():
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _commit(self, pending: list) -> list:
+        if not pending:
+            return pending
+        try:
+            self._write_batch(pending)
+        except Exception as e:
+            print(f"[WARNING] Chat log write failed, will retry: {e}")
+            return pending[-MAX_PENDING:]
+        self.batches += 1
+        self.rows += len(pending)
+        return []
+
+    def _run(self):
+        pending = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False  # interval elapsed
+
+            if isinstance(item, tuple):
+                pending.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self._flush_interval
+                if len(pending) < self._batch_size:
+                    continue
+
+            if isinstance(item, _Marker) and item.discard is not None:
+                pending = [row for row in pending if not item.discard(row)]
+            pending = self._commit(pending)
+            deadline = time.monotonic() + self._flush_interval if pending else None
+
+            if isinstance(item, _Marker):
+                item.ok = not pending
+                item.done.set()
+            elif item is None:
+                return
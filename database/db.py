@@ -1,13 +1,23 @@
+import atexit
 import sqlite3
 import pandas as pd
 import os
-from datetime import datetime
+import re
+import hashlib
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from database import pool
+from database.cache import QueryCache
+from database.chat_writer import ChatLogWriter
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(BASE_DIR)
 
 DB_NAME = "app.db"
-DB_PATH = os.path.join(BASE_DIR, DB_NAME) 
+# APP_DB_PATH points the app at another database, e.g. a generated one for benchmarks.
+DB_PATH = os.environ.get("APP_DB_PATH") or os.path.join(BASE_DIR, DB_NAME)
 
 
 FILES = {
@@ -16,226 +26,972 @@ FILES = {
     "DATASCI": os.path.join(PROJECT_ROOT, "Assets", "DataSci.csv")
 }
 
-def parse_messy_row(parts):
-    
-    parts = [p.strip().replace('"', '') for p in parts]
-    
-    col2 = parts[2] if len(parts) > 2 else ""
-    col3 = parts[3] if len(parts) > 3 else ""
-    
-    category = "Unknown"
-    issue_type = "Other"
-    description = ""
-    
-    if col2 == "IT" or col2 == "IT Operations":
-        category = "IT Operations"
-        desc_start = 4
-    elif col2 == "Cybersecurity":
-        category = "Cybersecurity"
-        desc_start = 3
-    elif col2 == "Data" and col3 == "Science":
-        category = "Data Science"
-        desc_start = 4
-    else:
-        category = "Unknown"
-        desc_start = 2
-
-    full_desc = " ".join(parts[desc_start:-2]) 
-    
-    known_issues = [
-        'Malware', 'Ransomware', 'Trojan', 'Phishing', 'DDoS',
-        'Server Failure', 'Network Down', 'VPN Access', 'Hardware', 'Software',
-        'Analytics', 'Data Cleaning', 'Model Training', 'Visualization', 'Dataset'
-    ]
-    
-    for issue in known_issues:
-        if full_desc.startswith(issue):
-            issue_type = issue
-            description = full_desc.replace(issue, "").strip().strip(',').strip()
-            if not description: description = full_desc 
-            break
-            
-    if issue_type == "Other":
-        description = full_desc
-        
-    return category, issue_type, description
-
-def load_and_parse_csvs():
-    all_data = []
-    
-    print(f"--- Starting Data Load ---")
-    print(f"Looking for files in Project Root: {PROJECT_ROOT}")
-    
-    for key, fpath in FILES.items():
-        if not os.path.exists(fpath):
-            print(f"[WARNING] Could not find file for {key}: {fpath}")
-            fallback = os.path.join(BASE_DIR, "Assets", os.path.basename(fpath))
-            if os.path.exists(fallback):
-                print(f"  -> Found in fallback location: {fallback}")
-                fpath = fallback
-            else:
-                continue
-            
-        print(f"Parsing {key} file: {fpath}")
-        try:
-            with open(fpath, 'r') as f:
-                lines = f.readlines()
-                for line in lines[1:]: # Skip header
-                    clean_line = line.replace('"', '').strip()
-                    parts = clean_line.split(',')
-                    
-                    if len(parts) < 5: continue
-                    
-                    category, issue, desc = parse_messy_row(parts)
-                    
-                    row = {
-                        'ticket_id': parts[0],
-                        'date': parts[1],
-                        'category': category,
-                        'issue_type': issue,
-                        'description': desc,
-                        'priority': parts[-2],
-                        'status': parts[-1]
-                    }
-                    all_data.append(row)
-        except Exception as e:
-            print(f"Error parsing {fpath}: {e}")
-            
-    print(f"--- Loaded {len(all_data)} total rows ---")
-    return all_data
+def resolve_asset(key, fpath):
+    """Returns the path of an Assets CSV, checking the fallback location."""
+    if os.path.exists(fpath):
+        return fpath
+    print(f"[WARNING] Could not find file for {key}: {fpath}")
+    fallback = os.path.join(BASE_DIR, "Assets", os.path.basename(fpath))
+    if os.path.exists(fallback):
+        print(f"  -> Found in fallback location: {fallback}")
+        return fallback
+    return None
+
+def file_sha256(fpath):
+    """Content hash of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(fpath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Each entry upgrades the schema by one version (tracked in PRAGMA user_version).
+# Append new entries; never edit one that has shipped.
+MIGRATIONS = [
+    '''
+    CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, password_hash TEXT, role TEXT);
+    CREATE TABLE IF NOT EXISTS it_tickets (ticket_id TEXT PRIMARY KEY, date TEXT, issue_type TEXT, description TEXT, priority TEXT, status TEXT);
+    CREATE TABLE IF NOT EXISTS security_incidents (ticket_id TEXT PRIMARY KEY, date TEXT, issue_type TEXT, description TEXT, priority TEXT, status TEXT);
+    CREATE TABLE IF NOT EXISTS data_science_projects (ticket_id TEXT PRIMARY KEY, date TEXT, issue_type TEXT, description TEXT, priority TEXT, status TEXT);
+    CREATE TABLE IF NOT EXISTS chat_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT,
+        module TEXT,  -- e.g., 'IT', 'CYBER', 'DATASCI'
+        sender TEXT,  -- 'user' or 'assistant'
+        message TEXT,
+        timestamp TEXT
+    );
+    CREATE TABLE IF NOT EXISTS seed_meta (key TEXT PRIMARY KEY, value TEXT);
+    CREATE TABLE IF NOT EXISTS seed_files (name TEXT PRIMARY KEY, sha256 TEXT, row_count INTEGER, seeded_at TEXT);
+    ''',
+    '''
+    -- Write counters per ticket table, read by the shared query cache.
+    CREATE TABLE IF NOT EXISTS table_versions (tbl TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0);
+    INSERT OR IGNORE INTO table_versions (tbl) VALUES ('it_tickets'), ('security_incidents'), ('data_science_projects');
+    CREATE TRIGGER IF NOT EXISTS it_tickets_version_ai AFTER INSERT ON it_tickets BEGIN UPDATE table_versions SET version = version + 1 WHERE tbl = 'it_tickets'; END;
+    CREATE TRIGGER IF NOT EXISTS it_tickets_version_au AFTER UPDATE ON it_tickets BEGIN UPDATE table_versions SET version = version + 1 WHERE tbl = 'it_tickets'; END;
+    CREATE TRIGGER IF NOT EXISTS it_tickets_version_ad AFTER DELETE ON it_tickets BEGIN UPDATE table_versions SET version = version + 1 WHERE tbl = 'it_tickets'; END;
+    CREATE TRIGGER IF NOT EXISTS security_incidents_version_ai AFTER INSERT ON security_incidents BEGIN UPDATE table_versions SET version = version + 1 WHERE tbl = 'security_incidents'; END;
+    CREATE TRIGGER IF NOT EXISTS security_incidents_version_au AFTER UPDATE ON security_incidents BEGIN UPDATE table_versions SET version = version + 1 WHERE tbl = 'security_incidents'; END;
+    CREATE TRIGGER IF NOT EXISTS security_incidents_version_ad AFTER DELETE ON security_incidents BEGIN UPDATE table_versions SET version = version + 1 WHERE tbl = 'security_incidents'; END;
+    CREATE TRIGGER IF NOT EXISTS data_science_projects_version_ai AFTER INSERT ON data_science_projects BEGIN UPDATE table_versions SET version = version + 1 WHERE tbl = 'data_science_projects'; END;
+    CREATE TRIGGER IF NOT EXISTS data_science_projects_version_au AFTER UPDATE ON data_science_projects BEGIN UPDATE table_versions SET version = version + 1 WHERE tbl = 'data_science_projects'; END;
+    CREATE TRIGGER IF NOT EXISTS data_science_projects_version_ad AFTER DELETE ON data_science_projects BEGIN UPDATE table_versions SET version = version + 1 WHERE tbl = 'data_science_projects'; END;
+    ''',
+    '''
+    -- Exact row counts per (table, priority, status, issue_type), kept by triggers
+    -- so dashboard metrics never scan the ticket tables. '' stands in for NULL.
+    CREATE TABLE IF NOT EXISTS ticket_counters (
+        tbl TEXT NOT NULL,
+        priority TEXT NOT NULL,
+        status TEXT NOT NULL,
+        issue_type TEXT NOT NULL,
+        n INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (tbl, priority, status, issue_type)
+    );
+    DELETE FROM ticket_counters;
+    INSERT INTO ticket_counters
+        SELECT 'it_tickets', IFNULL(priority, ''), IFNULL(status, ''), IFNULL(issue_type, ''), COUNT(*) FROM it_tickets GROUP BY 2, 3, 4;
+    INSERT INTO ticket_counters
+        SELECT 'security_incidents', IFNULL(priority, ''), IFNULL(status, ''), IFNULL(issue_type, ''), COUNT(*) FROM security_incidents GROUP BY 2, 3, 4;
+    INSERT INTO ticket_counters
+        SELECT 'data_science_projects', IFNULL(priority, ''), IFNULL(status, ''), IFNULL(issue_type, ''), COUNT(*) FROM data_science_projects GROUP BY 2, 3, 4;
+    CREATE TRIGGER IF NOT EXISTS it_tickets_counters_ai AFTER INSERT ON it_tickets BEGIN
+        INSERT INTO ticket_counters VALUES ('it_tickets', IFNULL(NEW.priority, ''), IFNULL(NEW.status, ''), IFNULL(NEW.issue_type, ''), 1)
+            ON CONFLICT (tbl, priority, status, issue_type) DO UPDATE SET n = n + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS it_tickets_counters_ad AFTER DELETE ON it_tickets BEGIN
+        UPDATE ticket_counters SET n = n - 1 WHERE tbl = 'it_tickets' AND priority = IFNULL(OLD.priority, '') AND status = IFNULL(OLD.status, '') AND issue_type = IFNULL(OLD.issue_type, '');
+    END;
+    CREATE TRIGGER IF NOT EXISTS it_tickets_counters_au AFTER UPDATE OF priority, status, issue_type ON it_tickets BEGIN
+        UPDATE ticket_counters SET n = n - 1 WHERE tbl = 'it_tickets' AND priority = IFNULL(OLD.priority, '') AND status = IFNULL(OLD.status, '') AND issue_type = IFNULL(OLD.issue_type, '');
+        INSERT INTO ticket_counters VALUES ('it_tickets', IFNULL(NEW.priority, ''), IFNULL(NEW.status, ''), IFNULL(NEW.issue_type, ''), 1)
+            ON CONFLICT (tbl, priority, status, issue_type) DO UPDATE SET n = n + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS security_incidents_counters_ai AFTER INSERT ON security_incidents BEGIN
+        INSERT INTO ticket_counters VALUES ('security_incidents', IFNULL(NEW.priority, ''), IFNULL(NEW.status, ''), IFNULL(NEW.issue_type, ''), 1)
+            ON CONFLICT (tbl, priority, status, issue_type) DO UPDATE SET n = n + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS security_incidents_counters_ad AFTER DELETE ON security_incidents BEGIN
+        UPDATE ticket_counters SET n = n - 1 WHERE tbl = 'security_incidents' AND priority = IFNULL(OLD.priority, '') AND status = IFNULL(OLD.status, '') AND issue_type = IFNULL(OLD.issue_type, '');
+    END;
+    CREATE TRIGGER IF NOT EXISTS security_incidents_counters_au AFTER UPDATE OF priority, status, issue_type ON security_incidents BEGIN
+        UPDATE ticket_counters SET n = n - 1 WHERE tbl = 'security_incidents' AND priority = IFNULL(OLD.priority, '') AND status = IFNULL(OLD.status, '') AND issue_type = IFNULL(OLD.issue_type, '');
+        INSERT INTO ticket_counters VALUES ('security_incidents', IFNULL(NEW.priority, ''), IFNULL(NEW.status, ''), IFNULL(NEW.issue_type, ''), 1)
+            ON CONFLICT (tbl, priority, status, issue_type) DO UPDATE SET n = n + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS data_science_projects_counters_ai AFTER INSERT ON data_science_projects BEGIN
+        INSERT INTO ticket_counters VALUES ('data_science_projects', IFNULL(NEW.priority, ''), IFNULL(NEW.status, ''), IFNULL(NEW.issue_type, ''), 1)
+            ON CONFLICT (tbl, priority, status, issue_type) DO UPDATE SET n = n + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS data_science_projects_counters_ad AFTER DELETE ON data_science_projects BEGIN
+        UPDATE ticket_counters SET n = n - 1 WHERE tbl = 'data_science_projects' AND priority = IFNULL(OLD.priority, '') AND status = IFNULL(OLD.status, '') AND issue_type = IFNULL(OLD.issue_type, '');
+    END;
+    CREATE TRIGGER IF NOT EXISTS data_science_projects_counters_au AFTER UPDATE OF priority, status, issue_type ON data_science_projects BEGIN
+        UPDATE ticket_counters SET n = n - 1 WHERE tbl = 'data_science_projects' AND priority = IFNULL(OLD.priority, '') AND status = IFNULL(OLD.status, '') AND issue_type = IFNULL(OLD.issue_type, '');
+        INSERT INTO ticket_counters VALUES ('data_science_projects', IFNULL(NEW.priority, ''), IFNULL(NEW.status, ''), IFNULL(NEW.issue_type, ''), 1)
+            ON CONFLICT (tbl, priority, status, issue_type) DO UPDATE SET n = n + 1;
+    END;
+    ''',
+    '''
+    -- Next ticket number per table. IDs are allocated from here inside the inserting
+    -- transaction; the triggers keep it ahead of IDs that arrive pre-assigned (CSV imports).
+    CREATE TABLE IF NOT EXISTS ticket_sequences (tbl TEXT PRIMARY KEY, next_id INTEGER NOT NULL);
+    INSERT OR REPLACE INTO ticket_sequences
+        SELECT 'it_tickets', MAX(1001, IFNULL(MAX(CAST(substr(ticket_id, 6) AS INTEGER)) + 1, 1001)) FROM it_tickets WHERE ticket_id GLOB 'TICK-[0-9]*';
+    INSERT OR REPLACE INTO ticket_sequences
+        SELECT 'security_incidents', MAX(1001, IFNULL(MAX(CAST(substr(ticket_id, 6) AS INTEGER)) + 1, 1001)) FROM security_incidents WHERE ticket_id GLOB 'TICK-[0-9]*';
+    INSERT OR REPLACE INTO ticket_sequences
+        SELECT 'data_science_projects', MAX(1001, IFNULL(MAX(CAST(substr(ticket_id, 6) AS INTEGER)) + 1, 1001)) FROM data_science_projects WHERE ticket_id GLOB 'TICK-[0-9]*';
+    CREATE TRIGGER IF NOT EXISTS it_tickets_sequence_ai AFTER INSERT ON it_tickets WHEN NEW.ticket_id GLOB 'TICK-[0-9]*' BEGIN
+        UPDATE ticket_sequences SET next_id = CAST(substr(NEW.ticket_id, 6) AS INTEGER) + 1
+            WHERE tbl = 'it_tickets' AND next_id <= CAST(substr(NEW.ticket_id, 6) AS INTEGER);
+    END;
+    CREATE TRIGGER IF NOT EXISTS security_incidents_sequence_ai AFTER INSERT ON security_incidents WHEN NEW.ticket_id GLOB 'TICK-[0-9]*' BEGIN
+        UPDATE ticket_sequences SET next_id = CAST(substr(NEW.ticket_id, 6) AS INTEGER) + 1
+            WHERE tbl = 'security_incidents' AND next_id <= CAST(substr(NEW.ticket_id, 6) AS INTEGER);
+    END;
+    CREATE TRIGGER IF NOT EXISTS data_science_projects_sequence_ai AFTER INSERT ON data_science_projects WHEN NEW.ticket_id GLOB 'TICK-[0-9]*' BEGIN
+        UPDATE ticket_sequences SET next_id = CAST(substr(NEW.ticket_id, 6) AS INTEGER) + 1
+            WHERE tbl = 'data_science_projects' AND next_id <= CAST(substr(NEW.ticket_id, 6) AS INTEGER);
+    END;
+    ''',
+    '''
+    -- Full-text indexes over issue_type/description, external-content on each table's rowid.
+    -- Run `python -m database.db reindex` after a VACUUM, which may renumber rowids.
+    CREATE VIRTUAL TABLE IF NOT EXISTS it_tickets_fts USING fts5(issue_type, description, content='it_tickets', content_rowid='rowid');
+    INSERT INTO it_tickets_fts(it_tickets_fts) VALUES ('rebuild');
+    CREATE TRIGGER IF NOT EXISTS it_tickets_fts_ai AFTER INSERT ON it_tickets BEGIN
+        INSERT INTO it_tickets_fts(rowid, issue_type, description) VALUES (NEW.rowid, NEW.issue_type, NEW.description);
+    END;
+    CREATE TRIGGER IF NOT EXISTS it_tickets_fts_ad AFTER DELETE ON it_tickets BEGIN
+        INSERT INTO it_tickets_fts(it_tickets_fts, rowid, issue_type, description) VALUES ('delete', OLD.rowid, OLD.issue_type, OLD.description);
+    END;
+    CREATE TRIGGER IF NOT EXISTS it_tickets_fts_au AFTER UPDATE OF issue_type, description ON it_tickets BEGIN
+        INSERT INTO it_tickets_fts(it_tickets_fts, rowid, issue_type, description) VALUES ('delete', OLD.rowid, OLD.issue_type, OLD.description);
+        INSERT INTO it_tickets_fts(rowid, issue_type, description) VALUES (NEW.rowid, NEW.issue_type, NEW.description);
+    END;
+    CREATE VIRTUAL TABLE IF NOT EXISTS security_incidents_fts USING fts5(issue_type, description, content='security_incidents', content_rowid='rowid');
+    INSERT INTO security_incidents_fts(security_incidents_fts) VALUES ('rebuild');
+    CREATE TRIGGER IF NOT EXISTS security_incidents_fts_ai AFTER INSERT ON security_incidents BEGIN
+        INSERT INTO security_incidents_fts(rowid, issue_type, description) VALUES (NEW.rowid, NEW.issue_type, NEW.description);
+    END;
+    CREATE TRIGGER IF NOT EXISTS security_incidents_fts_ad AFTER DELETE ON security_incidents BEGIN
+        INSERT INTO security_incidents_fts(security_incidents_fts, rowid, issue_type, description) VALUES ('delete', OLD.rowid, OLD.issue_type, OLD.description);
+    END;
+    CREATE TRIGGER IF NOT EXISTS security_incidents_fts_au AFTER UPDATE OF issue_type, description ON security_incidents BEGIN
+        INSERT INTO security_incidents_fts(security_incidents_fts, rowid, issue_type, description) VALUES ('delete', OLD.rowid, OLD.issue_type, OLD.description);
+        INSERT INTO security_incidents_fts(rowid, issue_type, description) VALUES (NEW.rowid, NEW.issue_type, NEW.description);
+    END;
+    CREATE VIRTUAL TABLE IF NOT EXISTS data_science_projects_fts USING fts5(issue_type, description, content='data_science_projects', content_rowid='rowid');
+    INSERT INTO data_science_projects_fts(data_science_projects_fts) VALUES ('rebuild');
+    CREATE TRIGGER IF NOT EXISTS data_science_projects_fts_ai AFTER INSERT ON data_science_projects BEGIN
+        INSERT INTO data_science_projects_fts(rowid, issue_type, description) VALUES (NEW.rowid, NEW.issue_type, NEW.description);
+    END;
+    CREATE TRIGGER IF NOT EXISTS data_science_projects_fts_ad AFTER DELETE ON data_science_projects BEGIN
+        INSERT INTO data_science_projects_fts(data_science_projects_fts, rowid, issue_type, description) VALUES ('delete', OLD.rowid, OLD.issue_type, OLD.description);
+    END;
+    CREATE TRIGGER IF NOT EXISTS data_science_projects_fts_au AFTER UPDATE OF issue_type, description ON data_science_projects BEGIN
+        INSERT INTO data_science_projects_fts(data_science_projects_fts, rowid, issue_type, description) VALUES ('delete', OLD.rowid, OLD.issue_type, OLD.description);
+        INSERT INTO data_science_projects_fts(rowid, issue_type, description) VALUES (NEW.rowid, NEW.issue_type, NEW.description);
+    END;
+    ''',
+    '''
+    -- One table for every department. priority/status/issue_type are stored as codes
+    -- into small label tables; the old table names become views over it, with
+    -- INSTEAD OF triggers routing writes, so existing queries keep working.
+    CREATE TABLE IF NOT EXISTS departments (id INTEGER PRIMARY KEY, tbl TEXT NOT NULL UNIQUE, name TEXT NOT NULL UNIQUE);
+    INSERT OR IGNORE INTO departments VALUES (1, 'it_tickets', 'IT Operations'), (2, 'security_incidents', 'Cyber Security'), (3, 'data_science_projects', 'Data Analysis');
+    CREATE TABLE IF NOT EXISTS issue_types (id INTEGER PRIMARY KEY, label TEXT NOT NULL UNIQUE);
+    CREATE TABLE IF NOT EXISTS priorities (id INTEGER PRIMARY KEY, label TEXT NOT NULL UNIQUE);
+    CREATE TABLE IF NOT EXISTS statuses (id INTEGER PRIMARY KEY, label TEXT NOT NULL UNIQUE);
+    INSERT OR IGNORE INTO issue_types (label)
+        SELECT issue_type FROM it_tickets WHERE issue_type IS NOT NULL UNION SELECT issue_type FROM security_incidents WHERE issue_type IS NOT NULL UNION SELECT issue_type FROM data_science_projects WHERE issue_type IS NOT NULL;
+    INSERT OR IGNORE INTO priorities (label)
+        SELECT priority FROM it_tickets WHERE priority IS NOT NULL UNION SELECT priority FROM security_incidents WHERE priority IS NOT NULL UNION SELECT priority FROM data_science_projects WHERE priority IS NOT NULL;
+    INSERT OR IGNORE INTO statuses (label)
+        SELECT status FROM it_tickets WHERE status IS NOT NULL UNION SELECT status FROM security_incidents WHERE status IS NOT NULL UNION SELECT status FROM data_science_projects WHERE status IS NOT NULL;
+    CREATE TABLE IF NOT EXISTS tickets (
+        id INTEGER PRIMARY KEY,
+        dept INTEGER NOT NULL REFERENCES departments (id),
+        ticket_id TEXT NOT NULL,
+        date TEXT,
+        issue_type INTEGER REFERENCES issue_types (id),
+        description TEXT,
+        priority INTEGER REFERENCES priorities (id),
+        status INTEGER REFERENCES statuses (id),
+        UNIQUE (dept, ticket_id)
+    );
+    INSERT INTO tickets (dept, ticket_id, date, issue_type, description, priority, status)
+        SELECT 1, t.ticket_id, t.date, i.id, t.description, p.id, s.id FROM it_tickets t
+        LEFT JOIN issue_types i ON i.label = t.issue_type LEFT JOIN priorities p ON p.label = t.priority LEFT JOIN statuses s ON s.label = t.status;
+    INSERT INTO tickets (dept, ticket_id, date, issue_type, description, priority, status)
+        SELECT 2, t.ticket_id, t.date, i.id, t.description, p.id, s.id FROM security_incidents t
+        LEFT JOIN issue_types i ON i.label = t.issue_type LEFT JOIN priorities p ON p.label = t.priority LEFT JOIN statuses s ON s.label = t.status;
+    INSERT INTO tickets (dept, ticket_id, date, issue_type, description, priority, status)
+        SELECT 3, t.ticket_id, t.date, i.id, t.description, p.id, s.id FROM data_science_projects t
+        LEFT JOIN issue_types i ON i.label = t.issue_type LEFT JOIN priorities p ON p.label = t.priority LEFT JOIN statuses s ON s.label = t.status;
+    -- Dropping the old tables also drops their version, counter, sequence and FTS triggers.
+    DROP TABLE IF EXISTS it_tickets_fts;
+    DROP TABLE IF EXISTS security_incidents_fts;
+    DROP TABLE IF EXISTS data_science_projects_fts;
+    DROP TABLE IF EXISTS it_tickets;
+    DROP TABLE IF EXISTS security_incidents;
+    DROP TABLE IF EXISTS data_science_projects;
+    CREATE VIEW IF NOT EXISTS tickets_labeled AS
+        SELECT t.id, t.dept, t.ticket_id, t.date, i.label AS issue_type, t.description, p.label AS priority, s.label AS status
+        FROM tickets t
+        LEFT JOIN issue_types i ON i.id = t.issue_type
+        LEFT JOIN priorities p ON p.id = t.priority
+        LEFT JOIN statuses s ON s.id = t.status;
+    CREATE VIEW IF NOT EXISTS it_tickets AS
+        SELECT ticket_id, date, issue_type, description, priority, status FROM tickets_labeled WHERE dept = 1;
+    CREATE TRIGGER IF NOT EXISTS it_tickets_insert INSTEAD OF INSERT ON it_tickets BEGIN
+        INSERT OR IGNORE INTO issue_types (label) SELECT NEW.issue_type WHERE NEW.issue_type IS NOT NULL;
+        INSERT OR IGNORE INTO priorities (label) SELECT NEW.priority WHERE NEW.priority IS NOT NULL;
+        INSERT OR IGNORE INTO statuses (label) SELECT NEW.status WHERE NEW.status IS NOT NULL;
+        INSERT INTO tickets (dept, ticket_id, date, issue_type, description, priority, status) VALUES (
+            1, NEW.ticket_id, NEW.date, (SELECT id FROM issue_types WHERE label = NEW.issue_type), NEW.description,
+            (SELECT id FROM priorities WHERE label = NEW.priority), (SELECT id FROM statuses WHERE label = NEW.status));
+    END;
+    CREATE TRIGGER IF NOT EXISTS it_tickets_update INSTEAD OF UPDATE ON it_tickets BEGIN
+        INSERT OR IGNORE INTO issue_types (label) SELECT NEW.issue_type WHERE NEW.issue_type IS NOT NULL;
+        INSERT OR IGNORE INTO priorities (label) SELECT NEW.priority WHERE NEW.priority IS NOT NULL;
+        INSERT OR IGNORE INTO statuses (label) SELECT NEW.status WHERE NEW.status IS NOT NULL;
+        UPDATE tickets SET ticket_id = NEW.ticket_id, date = NEW.date,
+            issue_type = (SELECT id FROM issue_types WHERE label = NEW.issue_type), description = NEW.description,
+            priority = (SELECT id FROM priorities WHERE label = NEW.priority), status = (SELECT id FROM statuses WHERE label = NEW.status)
+            WHERE dept = 1 AND ticket_id = OLD.ticket_id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS it_tickets_delete INSTEAD OF DELETE ON it_tickets BEGIN
+        DELETE FROM tickets WHERE dept = 1 AND ticket_id = OLD.ticket_id;
+    END;
+    CREATE VIEW IF NOT EXISTS security_incidents AS
+        SELECT ticket_id, date, issue_type, description, priority, status FROM tickets_labeled WHERE dept = 2;
+    CREATE TRIGGER IF NOT EXISTS security_incidents_insert INSTEAD OF INSERT ON security_incidents BEGIN
+        INSERT OR IGNORE INTO issue_types (label) SELECT NEW.issue_type WHERE NEW.issue_type IS NOT NULL;
+        INSERT OR IGNORE INTO priorities (label) SELECT NEW.priority WHERE NEW.priority IS NOT NULL;
+        INSERT OR IGNORE INTO statuses (label) SELECT NEW.status WHERE NEW.status IS NOT NULL;
+        INSERT INTO tickets (dept, ticket_id, date, issue_type, description, priority, status) VALUES (
+            2, NEW.ticket_id, NEW.date, (SELECT id FROM issue_types WHERE label = NEW.issue_type), NEW.description,
+            (SELECT id FROM priorities WHERE label = NEW.priority), (SELECT id FROM statuses WHERE label = NEW.status));
+    END;
+    CREATE TRIGGER IF NOT EXISTS security_incidents_update INSTEAD OF UPDATE ON security_incidents BEGIN
+        INSERT OR IGNORE INTO issue_types (label) SELECT NEW.issue_type WHERE NEW.issue_type IS NOT NULL;
+        INSERT OR IGNORE INTO priorities (label) SELECT NEW.priority WHERE NEW.priority IS NOT NULL;
+        INSERT OR IGNORE INTO statuses (label) SELECT NEW.status WHERE NEW.status IS NOT NULL;
+        UPDATE tickets SET ticket_id = NEW.ticket_id, date = NEW.date,
+            issue_type = (SELECT id FROM issue_types WHERE label = NEW.issue_type), description = NEW.description,
+            priority = (SELECT id FROM priorities WHERE label = NEW.priority), status = (SELECT id FROM statuses WHERE label = NEW.status)
+            WHERE dept = 2 AND ticket_id = OLD.ticket_id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS security_incidents_delete INSTEAD OF DELETE ON security_incidents BEGIN
+        DELETE FROM tickets WHERE dept = 2 AND ticket_id = OLD.ticket_id;
+    END;
+    CREATE VIEW IF NOT EXISTS data_science_projects AS
+        SELECT ticket_id, date, issue_type, description, priority, status FROM tickets_labeled WHERE dept = 3;
+    CREATE TRIGGER IF NOT EXISTS data_science_projects_insert INSTEAD OF INSERT ON data_science_projects BEGIN
+        INSERT OR IGNORE INTO issue_types (label) SELECT NEW.issue_type WHERE NEW.issue_type IS NOT NULL;
+        INSERT OR IGNORE INTO priorities (label) SELECT NEW.priority WHERE NEW.priority IS NOT NULL;
+        INSERT OR IGNORE INTO statuses (label) SELECT NEW.status WHERE NEW.status IS NOT NULL;
+        INSERT INTO tickets (dept, ticket_id, date, issue_type, description, priority, status) VALUES (
+            3, NEW.ticket_id, NEW.date, (SELECT id FROM issue_types WHERE label = NEW.issue_type), NEW.description,
+            (SELECT id FROM priorities WHERE label = NEW.priority), (SELECT id FROM statuses WHERE label = NEW.status));
+    END;
+    CREATE TRIGGER IF NOT EXISTS data_science_projects_update INSTEAD OF UPDATE ON data_science_projects BEGIN
+        INSERT OR IGNORE INTO issue_types (label) SELECT NEW.issue_type WHERE NEW.issue_type IS NOT NULL;
+        INSERT OR IGNORE INTO priorities (label) SELECT NEW.priority WHERE NEW.priority IS NOT NULL;
+        INSERT OR IGNORE INTO statuses (label) SELECT NEW.status WHERE NEW.status IS NOT NULL;
+        UPDATE tickets SET ticket_id = NEW.ticket_id, date = NEW.date,
+            issue_type = (SELECT id FROM issue_types WHERE label = NEW.issue_type), description = NEW.description,
+            priority = (SELECT id FROM priorities WHERE label = NEW.priority), status = (SELECT id FROM statuses WHERE label = NEW.status)
+            WHERE dept = 3 AND ticket_id = OLD.ticket_id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS data_science_projects_delete INSTEAD OF DELETE ON data_science_projects BEGIN
+        DELETE FROM tickets WHERE dept = 3 AND ticket_id = OLD.ticket_id;
+    END;
+    -- 'tickets' versions cross-department reads; each write also bumps its department's table.
+    INSERT OR IGNORE INTO table_versions (tbl) VALUES ('tickets');
+    CREATE TRIGGER IF NOT EXISTS tickets_version_ai AFTER INSERT ON tickets BEGIN
+        UPDATE table_versions SET version = version + 1 WHERE tbl IN ('tickets', (SELECT tbl FROM departments WHERE id = NEW.dept));
+    END;
+    CREATE TRIGGER IF NOT EXISTS tickets_version_au AFTER UPDATE ON tickets BEGIN
+        UPDATE table_versions SET version = version + 1
+            WHERE tbl IN ('tickets', (SELECT tbl FROM departments WHERE id = OLD.dept), (SELECT tbl FROM departments WHERE id = NEW.dept));
+    END;
+    CREATE TRIGGER IF NOT EXISTS tickets_version_ad AFTER DELETE ON tickets BEGIN
+        UPDATE table_versions SET version = version + 1 WHERE tbl IN ('tickets', (SELECT tbl FROM departments WHERE id = OLD.dept));
+    END;
+    -- Counters move to codes as well; 0 stands in for NULL.
+    DROP TABLE IF EXISTS ticket_counters;
+    CREATE TABLE ticket_counters (
+        dept INTEGER NOT NULL,
+        priority INTEGER NOT NULL,
+        status INTEGER NOT NULL,
+        issue_type INTEGER NOT NULL,
+        n INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (dept, priority, status, issue_type)
+    ) WITHOUT ROWID;
+    INSERT INTO ticket_counters
+        SELECT dept, IFNULL(priority, 0), IFNULL(status, 0), IFNULL(issue_type, 0), COUNT(*) FROM tickets GROUP BY 1, 2, 3, 4;
+    CREATE TRIGGER IF NOT EXISTS tickets_counters_ai AFTER INSERT ON tickets BEGIN
+        INSERT INTO ticket_counters VALUES (NEW.dept, IFNULL(NEW.priority, 0), IFNULL(NEW.status, 0), IFNULL(NEW.issue_type, 0), 1)
+            ON CONFLICT (dept, priority, status, issue_type) DO UPDATE SET n = n + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS tickets_counters_ad AFTER DELETE ON tickets BEGIN
+        UPDATE ticket_counters SET n = n - 1
+            WHERE dept = OLD.dept AND priority = IFNULL(OLD.priority, 0) AND status = IFNULL(OLD.status, 0) AND issue_type = IFNULL(OLD.issue_type, 0);
+    END;
+    CREATE TRIGGER IF NOT EXISTS tickets_counters_au AFTER UPDATE OF dept, priority, status, issue_type ON tickets BEGIN
+        UPDATE ticket_counters SET n = n - 1
+            WHERE dept = OLD.dept AND priority = IFNULL(OLD.priority, 0) AND status = IFNULL(OLD.status, 0) AND issue_type = IFNULL(OLD.issue_type, 0);
+        INSERT INTO ticket_counters VALUES (NEW.dept, IFNULL(NEW.priority, 0), IFNULL(NEW.status, 0), IFNULL(NEW.issue_type, 0), 1)
+            ON CONFLICT (dept, priority, status, issue_type) DO UPDATE SET n = n + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS tickets_sequence_ai AFTER INSERT ON tickets WHEN NEW.ticket_id GLOB 'TICK-[0-9]*' BEGIN
+        UPDATE ticket_sequences SET next_id = CAST(substr(NEW.ticket_id, 6) AS INTEGER) + 1
+            WHERE tbl = (SELECT tbl FROM departments WHERE id = NEW.dept) AND next_id <= CAST(substr(NEW.ticket_id, 6) AS INTEGER);
+    END;
+    -- One full-text index for all departments, keyed on tickets.id (stable across VACUUM).
+    CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5(issue_type, description, content='tickets_labeled', content_rowid='id');
+    INSERT INTO tickets_fts(tickets_fts) VALUES ('rebuild');
+    CREATE TRIGGER IF NOT EXISTS tickets_fts_ai AFTER INSERT ON tickets BEGIN
+        INSERT INTO tickets_fts(rowid, issue_type, description)
+            VALUES (NEW.id, (SELECT label FROM issue_types WHERE id = NEW.issue_type), NEW.description);
+    END;
+    CREATE TRIGGER IF NOT EXISTS tickets_fts_ad AFTER DELETE ON tickets BEGIN
+        INSERT INTO tickets_fts(tickets_fts, rowid, issue_type, description)
+            VALUES ('delete', OLD.id, (SELECT label FROM issue_types WHERE id = OLD.issue_type), OLD.description);
+    END;
+    CREATE TRIGGER IF NOT EXISTS tickets_fts_au AFTER UPDATE OF issue_type, description ON tickets BEGIN
+        INSERT INTO tickets_fts(tickets_fts, rowid, issue_type, description)
+            VALUES ('delete', OLD.id, (SELECT label FROM issue_types WHERE id = OLD.issue_type), OLD.description);
+        INSERT INTO tickets_fts(rowid, issue_type, description)
+            VALUES (NEW.id, (SELECT label FROM issue_types WHERE id = NEW.issue_type), NEW.description);
+    END;
+    ''',
+    '''
+    -- Read position per tailed CSV (database/tail.py): offset is the start of the first
+    -- line not yet fully ingested; inode and head (hash of the first data row) detect rotation.
+    CREATE TABLE IF NOT EXISTS ingest_offsets (
+        name TEXT PRIMARY KEY,
+        path TEXT NOT NULL,
+        inode INTEGER,
+        head TEXT,
+        offset INTEGER NOT NULL DEFAULT 0,
+        size INTEGER NOT NULL DEFAULT 0,
+        updated_at TEXT
+    );
+    ''',
+    '''
+    -- Parquet files holding archived tickets (database/archive.py). A file is part of
+    -- the archive only once listed here; the listing commits with the hot-row delete.
+    CREATE TABLE IF NOT EXISTS archive_files (
+        path TEXT PRIMARY KEY,
+        tbl TEXT NOT NULL,
+        partition TEXT NOT NULL,
+        rows INTEGER NOT NULL,
+        min_date TEXT,
+        max_date TEXT,
+        created_at TEXT
+    );
+    ''',
+    '''
+    -- Tickets moved to the Parquet archive, written with their archive_files row.
+    -- Ingestion skips these, so a reseed or the tail follower can't bring them back.
+    CREATE TABLE IF NOT EXISTS archived_tickets (
+        dept INTEGER NOT NULL REFERENCES departments (id),
+        ticket_id TEXT NOT NULL,
+        PRIMARY KEY (dept, ticket_id)
+    ) WITHOUT ROWID;
+    ''',
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+# Secondary indexes, kept in step with this list by sync_indexes() on every migrate.
+# Check new queries against them with `python -m database.query_plan`.
+INDEXES = {
+    "idx_chat_logs_user_module": ("chat_logs", ("username", "module", "id")),
+    # Ticket indexes lead with dept, so each department reads as its own partition.
+    "idx_tickets_status_priority": ("tickets", ("dept", "status", "priority")),
+    "idx_tickets_issue_type_status": ("tickets", ("dept", "issue_type", "status")),
+    "idx_tickets_date": ("tickets", ("dept", "date", "ticket_id")),
+}
+
+# Bump when the CSV parsing changes so every file is reloaded on the next seed.
+SEED_VERSION = 1
+
+CATEGORY_TABLES = {
+    "IT Operations": "it_tickets",
+    "Cybersecurity": "security_incidents",
+    "Data Science": "data_science_projects"
+}
+
+# Module keys used by the pages and the AI assistant.
+MODULE_TABLES = {
+    "IT": "it_tickets",
+    "CYBER": "security_incidents",
+    "DATASCI": "data_science_projects"
+}
+
+_ready = False
+_ready_lock = threading.Lock()
 
 def get_connection():
-    return sqlite3.connect(DB_PATH)
-
-def init_db(force_reset=True):
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    if force_reset:
-        cursor.execute("DROP TABLE IF EXISTS it_tickets")
-        cursor.execute("DROP TABLE IF EXISTS security_incidents")
-        cursor.execute("DROP TABLE IF EXISTS data_science_projects")
-        cursor.execute("DROP TABLE IF EXISTS users")
-
-    cursor.execute('''CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, password_hash TEXT, role TEXT)''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS it_tickets (ticket_id TEXT PRIMARY KEY, date TEXT, issue_type TEXT, description TEXT, priority TEXT, status TEXT)''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS security_incidents (ticket_id TEXT PRIMARY KEY, date TEXT, issue_type TEXT, description TEXT, priority TEXT, status TEXT)''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS data_science_projects (ticket_id TEXT PRIMARY KEY, date TEXT, issue_type TEXT, description TEXT, priority TEXT, status TEXT)''')
-
-    all_rows = load_and_parse_csvs()
-    
-    counts = {"IT": 0, "Cyber": 0, "DS": 0}
-    
-    for row in all_rows:
-        if row['category'] == "IT Operations":
-            cursor.execute('INSERT OR REPLACE INTO it_tickets VALUES (:ticket_id, :date, :issue_type, :description, :priority, :status)', row)
-            counts["IT"] += 1
-        elif row['category'] == "Cybersecurity":
-            cursor.execute('INSERT OR REPLACE INTO security_incidents VALUES (:ticket_id, :date, :issue_type, :description, :priority, :status)', row)
-            counts["Cyber"] += 1
-        elif row['category'] == "Data Science":
-            cursor.execute('INSERT OR REPLACE INTO data_science_projects VALUES (:ticket_id, :date, :issue_type, :description, :priority, :status)', row)
-            counts["DS"] += 1
+    """A standalone connection with the pool's pragmas, for scripts and bulk jobs."""
+    conn = pool.configure(sqlite3.connect(DB_PATH))
+    if not _ready:
+        _prepare(conn)
+    return conn
 
-    try:
-        cursor.execute("INSERT INTO users VALUES (?, ?, ?)", ("admin", "0000", "admin"))
-    except: pass
-    
+@contextmanager
+def connection():
+    """Borrows a long-lived connection from the process-wide pool."""
+    with pool.get_pool(DB_PATH).connection() as conn:
+        if not _ready:
+            _prepare(conn)
+        yield conn
+
+def ensure_db():
+    """Makes sure the schema exists before first use. Cheap after the first call."""
+    if not _ready:
+        with connection():
+            pass
+
+def _prepare(conn):
+    """Runs pending migrations once per process; seeds only a database that was never seeded."""
+    global _ready
+    with _ready_lock:
+        if _ready:
+            return
+        migrate(conn)
+        if get_seed_version(conn) is None:
+            seed_db(conn)
+        _ready = True
+
+# Shared by every session in the process; see database/cache.py.
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+_version_conn = None
+_version_lock = threading.Lock()
+_data_version = None
+_table_versions = {}
+
+def table_versions():
+    """
+    Per-table write counters kept by triggers (see table_versions). They are
+    only re-read when PRAGMA data_version says another connection committed.
+    """
+    global _version_conn, _data_version, _table_versions
+    ensure_db()
+    with _version_lock:
+        if _version_conn is None:
+            _version_conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        version = _version_conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != _data_version:
+            _table_versions = dict(_version_conn.execute("SELECT tbl, version FROM table_versions"))
+            _data_version = version
+        return _table_versions
+
+cache = QueryCache(CACHE_MAX_BYTES, version_check=table_versions)
+
+def read_sql(sql, params=()):
+    with connection() as conn:
+        return pd.read_sql(sql, conn, params=params)
+
+def _statements(script):
+    """Splits a migration script into single statements (trigger bodies included)."""
+    statement = ""
+    for part in script.split(";"):
+        statement += part + ";"
+        if sqlite3.complete_statement(statement):
+            if statement.strip(" \n;"):
+                yield statement
+            statement = ""
+
+def migrate(conn):
+    """
+    Applies the migrations newer than the database's schema version, each in one
+    transaction with its user_version bump, then syncs INDEXES. The version is
+    re-read under the write lock, so concurrent processes never both apply a step.
+    """
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    applied = 0
+    while current < SCHEMA_VERSION:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = conn.execute("PRAGMA user_version").fetchone()[0]
+            if current < SCHEMA_VERSION:
+                # Not executescript(): it commits first and runs in autocommit mode.
+                for statement in _statements(MIGRATIONS[current]):
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {current + 1}")
+                current += 1
+                applied += 1
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    sync_indexes(conn)
     conn.commit()
-    conn.close()
+    return applied
+
+def sync_indexes(conn):
+    """Creates missing INDEXES and drops managed (idx_*) indexes that are no longer listed."""
+    existing = {
+        name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='index' AND name GLOB 'idx_*'")
+    }
+    for name, (table, columns) in INDEXES.items():
+        if name not in existing:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+    for name in existing - set(INDEXES):
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+def get_seed_version(conn):
+    res = conn.execute("SELECT value FROM seed_meta WHERE key='seed_version'").fetchone()
+    return int(res[0]) if res else None
+
+def seed_db(conn, force=False, files=None):
+    """Loads only the Assets CSVs (or `files`, {key: path}) whose content hash changed since the last seed."""
+    from database import ingest, tail
+
+    if get_seed_version(conn) != SEED_VERSION:
+        force = True
+
+    changed, hashes, unchanged, positions = {}, {}, [], {}
+    for key, fpath in (files or FILES).items():
+        fpath = resolve_asset(key, fpath)
+        if fpath is None:
+            continue
+
+        # Taken before hashing and parsing: anything appended later is left to the tail follower.
+        positions[key] = (fpath, tail.snapshot(fpath))
+        sha = file_sha256(fpath)
+        res = conn.execute("SELECT sha256 FROM seed_files WHERE name=?", (key,)).fetchone()
+        if not force and res and res[0] == sha:
+            unchanged.append(key)
+            continue
+        changed[key] = fpath
+        hashes[key] = sha
+
+    # One transaction: the rows, the recorded hashes and the seed version land together.
+    stats = ingest.ingest_files(conn, changed, commit=False) if changed else ingest.IngestStats()
+
+    dt = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    conn.executemany(
+        "INSERT OR REPLACE INTO seed_files VALUES (?, ?, ?, ?)",
+        [(key, hashes[key], stats.files.get(key, 0), dt) for key in changed]
+    )
+    # The tail follower starts where the seed stopped instead of re-reading (and
+    # overwriting UI edits with) the whole file. An unchanged file keeps any
+    # position the follower already has.
+    for key, (fpath, state) in positions.items():
+        known = conn.execute("SELECT 1 FROM ingest_offsets WHERE name=?", (key,)).fetchone()
+        if key in changed or not known:
+            tail.mark_read(conn, key, fpath, state)
+    conn.execute("INSERT OR IGNORE INTO users VALUES (?, ?, ?)", ("admin", "0000", "admin"))
+    conn.execute("INSERT OR REPLACE INTO seed_meta VALUES ('seed_version', ?)", (str(SEED_VERSION),))
+    conn.commit()
+
+    counts = {
+        "IT": stats.tables.get("it_tickets", 0),
+        "Cyber": stats.tables.get("security_incidents", 0),
+        "DS": stats.tables.get("data_science_projects", 0)
+    }
+    if unchanged:
+        print(f"Unchanged since last seed: {', '.join(unchanged)}")
     print(f"Database Seeded! IT: {counts['IT']}, Cyber: {counts['Cyber']}, DS: {counts['DS']}")
+    return counts
+
+# Dropped by a reset, views first; the migrations recreate them from scratch.
+RESET_OBJECTS = (
+    "it_tickets", "security_incidents", "data_science_projects", "tickets_labeled",
+    "tickets_fts", "tickets", "ticket_counters", "departments", "priorities", "statuses", "issue_types",
+    "users", "seed_meta", "seed_files", "ingest_offsets", "archive_files", "archived_tickets",
+)
+
+def init_db(force_reset=False, files=None):
+    """Migrates the schema and reloads changed CSVs. force_reset drops all data first."""
+    conn = pool.configure(sqlite3.connect(DB_PATH))
+    try:
+        if force_reset:
+            for name in RESET_OBJECTS:
+                res = conn.execute("SELECT type FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+                if res:
+                    conn.execute(f"DROP {res[0].upper()} {name}")
+            conn.execute("PRAGMA user_version = 0")
+        migrate(conn)
+        return seed_db(conn, force=force_reset, files=files)
+    finally:
+        conn.close()
 
 def fetch_all(table_name):
-    conn = get_connection()
     try:
-        return pd.read_sql(f"SELECT * FROM {table_name}", conn)
+        return cache.get(table_name, "*", lambda: read_sql(f"SELECT * FROM {table_name}"))
     except:
         return pd.DataFrame()
-    finally:
-        conn.close()
 
-def generate_id(table_name):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(f"SELECT ticket_id FROM {table_name} ORDER BY ticket_id DESC LIMIT 1")
-    res = cursor.fetchone()
-    conn.close()
-    if res:
-        return f"TICK-{int(res[0].split('-')[1]) + 1}"
-    return "TICK-1001"
+def fetch_unified():
+    """
+    Every ticket with its department's dashboard name, from one query over the
+    tickets table. Priority and status come title-cased, done once per label
+    when the result is cached rather than on every render.
+    """
+    sql = """
+        SELECT d.name AS Department, t.ticket_id, t.date, t.issue_type, t.description, t.priority, t.status
+        FROM tickets_labeled t JOIN departments d ON d.id = t.dept
+    """
+
+    def load():
+        df = read_sql(sql)
+        for col in ("priority", "status"):
+            df[col] = df[col].map({label: label.title() for label in df[col].dropna().unique()})
+        return df
+
+    return cache.get("tickets", "*", load)
+
+GROUPABLE_COLUMNS = ("priority", "status", "issue_type", "date")
+
+COUNTER_COLUMNS = ("priority", "status", "issue_type")
+
+LABEL_TABLES = {"priority": "priorities", "status": "statuses", "issue_type": "issue_types"}
+
+def _counter_sql(columns):
+    # Counters hold codes; join each grouped column to its label table.
+    select = ", ".join(f"l_{c}.label AS {c}" for c in columns)
+    joins = " ".join(f"LEFT JOIN {LABEL_TABLES[c]} l_{c} ON l_{c}.id = c.{c}" for c in columns)
+    return select, joins
+
+def count_by(table_name, columns):
+    """
+    Row counts grouped by `columns`, computed in SQL. Returns the columns plus `count`.
+    Groupings over priority/status/issue_type are read from ticket_counters.
+    """
+    columns = list(columns)
+    for col in columns:
+        if col not in GROUPABLE_COLUMNS:
+            raise ValueError(f"Cannot group by {col!r}")
+    cols = ", ".join(columns)
+    if set(columns) <= set(COUNTER_COLUMNS):
+        select, joins = _counter_sql(columns)
+        sql = f"""
+            SELECT {select}, SUM(c.n) AS count FROM ticket_counters c {joins}
+            WHERE c.dept = (SELECT id FROM departments WHERE tbl = ?) AND c.n > 0
+            GROUP BY {", ".join(str(i + 1) for i in range(len(columns)))}
+        """
+        params = (table_name,)
+    else:
+        sql = f"SELECT {cols}, COUNT(*) AS count FROM {table_name} GROUP BY {cols}"
+        params = ()
+    try:
+        return cache.get(table_name, ("count_by", tuple(columns)), lambda: read_sql(sql, params))
+    except Exception:
+        return pd.DataFrame(columns=columns + ["count"])
+
+def count_by_department(columns):
+    """
+    count_by() over every department in one query on ticket_counters, with the
+    department's dashboard name in a `Department` column.
+    """
+    columns = list(columns)
+    for col in columns:
+        if col not in COUNTER_COLUMNS:
+            raise ValueError(f"Cannot group counters by {col!r}")
+    select, joins = _counter_sql(columns)
+    sql = f"""
+        SELECT d.name AS Department{", " + select if columns else ""}, SUM(c.n) AS count
+        FROM ticket_counters c JOIN departments d ON d.id = c.dept {joins}
+        WHERE c.n > 0
+        GROUP BY {", ".join(str(i + 1) for i in range(len(columns) + 1))}
+    """
+    return cache.get("tickets", ("count_by_department", tuple(columns)), lambda: read_sql(sql))
+
+def count_tickets(table_name, **filters):
+    """
+    Number of tickets matching filters on priority/status/issue_type, read from
+    ticket_counters, e.g. count_tickets("it_tickets", priority=["High", "Critical"]).
+    The cost depends on the number of distinct groups, never on the table size.
+    """
+    where, params = ["dept = (SELECT id FROM departments WHERE tbl = ?)"], [table_name]
+    for col, value in sorted(filters.items()):
+        if col not in COUNTER_COLUMNS:
+            raise ValueError(f"Cannot filter counters by {col!r}")
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        labels = [v for v in values if v is not None]
+        cond = f"{col} IN (SELECT id FROM {LABEL_TABLES[col]} WHERE label IN ({', '.join('?' * len(labels))}))"
+        if len(labels) < len(values):
+            cond = f"({cond} OR {col} = 0)"  # None matches the missing value
+        where.append(cond)
+        params.extend(labels)
+    sql = f"SELECT IFNULL(SUM(n), 0) FROM ticket_counters WHERE {' AND '.join(where)}"
+
+    def load():
+        with connection() as conn:
+            return conn.execute(sql, params).fetchone()[0]
+
+    key = ("count_tickets", tuple(sorted((k, str(v)) for k, v in filters.items())))
+    return cache.get(table_name, key, load)
+
+OPEN_EXCLUDED_STATUSES = ("Resolved", "Closed")
+
+def weekly_counts(table_name, weeks=8):
+    """Tickets per ISO-style week (YYYY-WW) for the latest `weeks` weeks with data."""
+    sql = f"""
+        SELECT strftime('%Y-W%W', date) AS week, COUNT(*) AS count
+        FROM {table_name} WHERE date IS NOT NULL
+        GROUP BY week ORDER BY week DESC LIMIT ?
+    """
+    return cache.get(table_name, ("weekly", weeks), lambda: read_sql(sql, (weeks,)))
+
+def oldest_open(table_name, limit=5):
+    """The longest-waiting tickets that are not Resolved/Closed, walked in date-index order."""
+    sql = f"""
+        SELECT ticket_id, date, issue_type, priority, status FROM {table_name}
+        WHERE status NOT IN (?, ?) ORDER BY date ASC, ticket_id ASC LIMIT ?
+    """
+    return cache.get(table_name, ("oldest_open", limit), lambda: read_sql(sql, (*OPEN_EXCLUDED_STATUSES, limit)))
+
+def fetch_by_id(table_name, tid):
+    """One ticket as a dict (or None), read through the primary key."""
+    with connection() as conn:
+        cur = conn.execute(f"SELECT * FROM {table_name} WHERE ticket_id=?", (tid,))
+        res = cur.fetchone()
+        if res is None:
+            return None
+        return dict(zip([d[0] for d in cur.description], res))
+
+def find_ids(table_name, prefix="", limit=50):
+    """Ticket IDs starting with `prefix`, as a range scan on the primary key."""
+    prefix = prefix.strip()
+    if prefix.isdigit():
+        prefix = f"TICK-{prefix}"
+    with connection() as conn:
+        rows = conn.execute(
+            f"SELECT ticket_id FROM {table_name} WHERE ticket_id >= ? AND ticket_id < ? ORDER BY ticket_id LIMIT ?",
+            (prefix, prefix + "\U0010ffff", limit)
+        ).fetchall()
+    return [r[0] for r in rows]
+
+def fetch_page(table_name, page_size=50, cursor=None, **filters):
+    """
+    One page of tickets, newest first, using keyset pagination on (date, ticket_id).
+    `cursor` is the (date, ticket_id) of the last row of the previous page;
+    filters on priority/status/issue_type take a value or a list of values.
+    Returns (DataFrame, next_cursor), where next_cursor is None on the last page.
+    """
+    where, params = [], []
+    for col, value in sorted(filters.items()):
+        if col not in COUNTER_COLUMNS:
+            raise ValueError(f"Cannot filter by {col!r}")
+        if value is None or value == []:
+            continue
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        where.append(f"{col} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    if cursor is not None:
+        where.append("(date, ticket_id) < (?, ?)")
+        params.extend(cursor)
+
+    sql = f"SELECT * FROM {table_name}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY date DESC, ticket_id DESC LIMIT ?"
+    params.append(page_size + 1)
+
+    key = ("page", sql, tuple(params))  # the SQL carries the filtered column names
+    df = cache.get(table_name, key, lambda: read_sql(sql, params))
+    if len(df) > page_size:
+        df = df.iloc[:page_size]
+        last = df.iloc[-1]
+        return df, (last['date'], last['ticket_id'])
+    return df, None
+
+def fts_query(text, match_any=False):
+    """Turns free text into an FTS5 query: every word quoted and prefix-matched, ANDed (or ORed)."""
+    words = re.findall(r"\w+", text)
+    return (" OR " if match_any else " ").join(f'"{w}"*' for w in words)
+
+def search(query, department=None, limit=20, match_any=False):
+    """
+    Ranked full-text search over issue_type and description, one FTS index for
+    every department. `department` is a table or module name ("IT", "CYBER",
+    "DATASCI"); None searches all three.
+    Returns the matching rows with `source` (table) and `score` (bm25, lower is better).
+    """
+    match = fts_query(query, match_any)
+    columns = ["source", "ticket_id", "date", "issue_type", "description", "priority", "status", "score"]
+    if not match:
+        return pd.DataFrame(columns=columns)
+
+    sql = """
+        SELECT d.tbl AS source, t.ticket_id, t.date, t.issue_type, t.description, t.priority, t.status,
+               bm25(tickets_fts) AS score
+        FROM tickets_fts
+        JOIN tickets_labeled t ON t.id = tickets_fts.rowid
+        JOIN departments d ON d.id = t.dept
+        WHERE tickets_fts MATCH ?
+    """
+    params = [match]
+    table = "tickets"
+    if department is not None:
+        table = MODULE_TABLES.get(department, department)
+        sql += " AND d.tbl = ?"
+        params.append(table)
+    sql += " ORDER BY score LIMIT ?"
+    params.append(limit)
+
+    return cache.get(table, ("search", match, limit), lambda: read_sql(sql, params))
+
+def rebuild_search_index():
+    """Rebuilds the full-text index from the tickets table."""
+    with connection() as conn:
+        conn.execute("INSERT INTO tickets_fts(tickets_fts) VALUES ('rebuild')")
+        conn.commit()
+
+def allocate_ids(conn, table_name, count=1):
+    """
+    Reserves `count` consecutive ticket numbers from ticket_sequences and returns
+    them as a range. Call it in the same transaction as the inserts: the UPDATE
+    takes SQLite's write lock, so concurrent sessions can never get the same number.
+    """
+    conn.execute("UPDATE ticket_sequences SET next_id = next_id + ? WHERE tbl = ?", (count, table_name))
+    end = conn.execute("SELECT next_id FROM ticket_sequences WHERE tbl = ?", (table_name,)).fetchone()[0]
+    return range(end - count, end)
+
+def generate_id(table_name, conn=None):
+    """The ID the next insert will get. A preview only; add_entry allocates atomically."""
+    if conn is None:
+        with connection() as conn:
+            return generate_id(table_name, conn)
+    res = conn.execute("SELECT next_id FROM ticket_sequences WHERE tbl = ?", (table_name,)).fetchone()
+    return f"TICK-{res[0] if res else 1001}"
 
 def add_entry(table_name, issue, desc, prio, stat):
-    tid = generate_id(table_name)
     dt = datetime.now().strftime("%Y-%m-%d")
-    conn = get_connection()
-    conn.execute(f"INSERT INTO {table_name} VALUES (?, ?, ?, ?, ?, ?)", (tid, dt, issue, desc, prio, stat))
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        tid = f"TICK-{allocate_ids(conn, table_name)[0]}"
+        conn.execute(f"INSERT INTO {table_name} VALUES (?, ?, ?, ?, ?, ?)", (tid, dt, issue, desc, prio, stat))
+        conn.commit()
+    cache.invalidate(table_name)
+    return tid
 
 def update_entry(table_name, tid, issue, desc, prio, stat):
-    conn = get_connection()
-    conn.execute(f"UPDATE {table_name} SET issue_type=?, description=?, priority=?, status=? WHERE ticket_id=?", (issue, desc, prio, stat, tid))
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        conn.execute(f"UPDATE {table_name} SET issue_type=?, description=?, priority=?, status=? WHERE ticket_id=?", (issue, desc, prio, stat, tid))
+        conn.commit()
+    cache.invalidate(table_name)
 
 def delete_entry(table_name, tid):
-    conn = get_connection()
-    conn.execute(f"DELETE FROM {table_name} WHERE ticket_id=?", (tid,))
-    conn.commit()
-    conn.close()
-
-init_db()
-
-
-def init_chat_db():
-    """Adds the chat_logs table if it doesn't exist."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS chat_logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT,
-            module TEXT,  -- e.g., 'IT', 'CYBER', 'DATASCI'
-            sender TEXT,  -- 'user' or 'assistant'
-            message TEXT,
-            timestamp TEXT
+    with connection() as conn:
+        conn.execute(f"DELETE FROM {table_name} WHERE ticket_id=?", (tid,))
+        conn.commit()
+    cache.invalidate(table_name)
+
+def _write_chat_rows(rows):
+    with connection() as conn:
+        conn.executemany(
+            "INSERT INTO chat_logs (username, module, sender, message, timestamp) VALUES (?, ?, ?, ?, ?)",
+            rows
         )
-    ''')
-    conn.commit()
-    conn.close()
+        conn.commit()
+
+# Chat messages are written behind, in batches; see database/chat_writer.py.
+chat_writer = ChatLogWriter(_write_chat_rows)
+atexit.register(chat_writer.close)
 
 def save_chat_message(username, module, sender, message):
-    """Saves a single message to the DB."""
-    conn = get_connection()
+    """Queues a single message for the DB; it is committed with the next batch."""
     dt = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    conn.execute(
-        "INSERT INTO chat_logs (username, module, sender, message, timestamp) VALUES (?, ?, ?, ?, ?)",
-        (username, module, sender, message, dt)
-    )
-    conn.commit()
-    conn.close()
+    chat_writer.write((username, module, sender, message, dt))
 
-def get_chat_history(username, module):
-    """Retrieves chat history for a specific user and module."""
-    conn = get_connection()
-    try:
-        df = pd.read_sql(
-            f"SELECT sender, message FROM chat_logs WHERE username='{username}' AND module='{module}' ORDER BY id ASC LIMIT 50", 
-            conn
-        )
-        return df.to_dict('records')
-    except:
-        return []
-    finally:
-        conn.close()
+def flush_chat_messages():
+    """Blocks until every queued chat message is committed."""
+    return chat_writer.flush()
+
+CHAT_PAGE_SIZE = 50
+
+def get_chat_history(username, module, limit=CHAT_PAGE_SIZE, before_id=None):
+    """
+    Returns up to `limit` of the most recent messages for a user and module as
+    (id, sender, message) tuples, oldest first. Pass the smallest id already
+    shown as `before_id` to load the page before it.
+    """
+    flush_chat_messages()
+    sql = "SELECT id, sender, message FROM chat_logs WHERE username=? AND module=?"
+    params = [username, module]
+    if before_id is not None:
+        sql += " AND id < ?"
+        params.append(before_id)
+    sql += " ORDER BY id DESC LIMIT ?"
+    params.append(limit)
+
+    with connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    rows.reverse()
+    return rows
 
 def delete_chat_history(username, module):
     """Permanently wipes chat logs for a specific user and module."""
-    conn = get_connection()
-    conn.execute(
-        "DELETE FROM chat_logs WHERE username=? AND module=?", 
-        (username, module)
-    )
-    conn.commit()
-    conn.close()
-init_chat_db()
+    # Queued messages of this conversation are dropped, or a retried batch would bring them back.
+    chat_writer.discard(lambda row: row[0] == username and row[1] == module)
+    with connection() as conn:
+        conn.execute(
+            "DELETE FROM chat_logs WHERE username=? AND module=?", 
+            (username, module)
+        )
+        conn.commit()
+
+CHAT_KEEP_PER_CONVERSATION = 500
+CHAT_MAX_AGE_DAYS = 90
+
+def compact_chat_logs(keep=CHAT_KEEP_PER_CONVERSATION, max_age_days=CHAT_MAX_AGE_DAYS, vacuum=False):
+    """
+    Retention for chat_logs: keeps the newest `keep` messages of each
+    (username, module) conversation and drops anything older than
+    `max_age_days`. Returns the number of rows deleted.
+    """
+    flush_chat_messages()
+    cutoff = (datetime.now() - timedelta(days=max_age_days)).strftime("%Y-%m-%d %H:%M:%S")
+    with connection() as conn:
+        cur = conn.execute("""
+            DELETE FROM chat_logs WHERE timestamp < ? OR id IN (
+                SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (PARTITION BY username, module ORDER BY id DESC) AS rn
+                    FROM chat_logs
+                ) WHERE rn > ?
+            )
+        """, (cutoff, keep))
+        conn.commit()
+        deleted = cur.rowcount
+    if vacuum and deleted:
+        with connection() as conn:
+            conn.execute("VACUUM")
+    return deleted
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Database maintenance: schema migrations and CSV seeding.")
+    arg_parser.add_argument("command", choices=["migrate", "seed", "reset", "reindex", "compact-chat"])
+    arg_parser.add_argument("--force", action="store_true", help="Reload every CSV, even if unchanged.")
+    arg_parser.add_argument("--keep", type=int, default=CHAT_KEEP_PER_CONVERSATION, help="compact-chat: messages kept per user and module.")
+    arg_parser.add_argument("--days", type=int, default=CHAT_MAX_AGE_DAYS, help="compact-chat: drop messages older than this.")
+    arg_parser.add_argument("--vacuum", action="store_true", help="compact-chat: VACUUM afterwards to return the space.")
+    args = arg_parser.parse_args()
+
+    if args.command == "reset":
+        init_db(force_reset=True)
+    elif args.command == "reindex":
+        rebuild_search_index()
+        print("Search indexes rebuilt.")
+    elif args.command == "compact-chat":
+        deleted = compact_chat_logs(args.keep, args.days, args.vacuum)
+        print(f"Removed {deleted} chat message(s).")
+    else:
+        conn = pool.configure(sqlite3.connect(DB_PATH))
+        applied = migrate(conn)
+        print(f"Applied {applied} migration(s); schema at version {SCHEMA_VERSION}.")
+        if args.command == "seed":
+            seed_db(conn, force=args.force)
+        conn.close()
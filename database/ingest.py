@@ -0,0 +1,128 @@
+import time
+import database.db as db
+from database import parser as csv_parser
+
+BATCH_SIZE = 5000
+
+# Writes go straight to the unified tickets table; labels are turned into codes in SQL.
+# Archived tickets (see database/archive.py) are skipped rather than reinserted.
+UPSERT_SQL = """
+    INSERT INTO tickets (dept, ticket_id, date, issue_type, description, priority, status)
+    SELECT
+        d.id, :ticket_id, :date,
+        (SELECT id FROM issue_types WHERE label = :issue_type), :description,
+        (SELECT id FROM priorities WHERE label = :priority), (SELECT id FROM statuses WHERE label = :status)
+    FROM departments d
+    WHERE d.tbl = '{table}'
+        AND NOT EXISTS (SELECT 1 FROM archived_tickets a WHERE a.dept = d.id AND a.ticket_id = :ticket_id)
+    ON CONFLICT(dept, ticket_id) DO UPDATE SET
+        date=excluded.date, issue_type=excluded.issue_type, description=excluded.description,
+        priority=excluded.priority, status=excluded.status
+"""
+
+LABEL_SQL = "INSERT OR IGNORE INTO {labels} (label) VALUES (?)"
+
+
+class IngestStats:
+    """Running totals for one ingestion run."""
+
+    def __init__(self):
+        self.rows = 0
+        self.skipped = 0
+        self.tables = {}
+        self.files = {}
+        self.started = time.perf_counter()
+        self.finished = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __str__(self):
+        return f"{self.rows:,} rows ({self.skipped:,} skipped) in {self.elapsed:.2f}s - {self.rows_per_sec:,.0f} rows/s"
+
+
+def print_progress(stats: IngestStats):
+    print(f"  ... {stats}")
+
+
+def ingest_rows(conn, rows, batch_size: int = BATCH_SIZE, progress=print_progress, commit: bool = True, stats: IngestStats | None = None) -> IngestStats:
+    """
+    Routes parsed rows to their ticket table with executemany batches inside a
+    single transaction. Only one batch per table is held in memory at a time.
+    """
+    stats = stats or IngestStats()
+    batches = {table: [] for table in db.CATEGORY_TABLES.values()}
+
+    def flush(table):
+        for col, labels in db.LABEL_TABLES.items():
+            values = {row[col] for row in batches[table] if row[col] is not None}
+            conn.executemany(LABEL_SQL.format(labels=labels), [(v,) for v in values])
+        conn.executemany(UPSERT_SQL.format(table=table), batches[table])
+        stats.tables[table] = stats.tables.get(table, 0) + len(batches[table])
+        stats.rows += len(batches[table])
+        batches[table].clear()
+        if progress:
+            progress(stats)
+
+    try:
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        for row in rows:
+            table = db.CATEGORY_TABLES.get(row['category'])
+            if table is None:
+                stats.skipped += 1
+                continue
+            batches[table].append(row)
+            if len(batches[table]) >= batch_size:
+                flush(table)
+        for table, batch in batches.items():
+            if batch:
+                flush(table)
+        if commit:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    stats.finished = time.perf_counter()
+    return stats
+
+
+def ingest_files(conn, files: dict, batch_size: int = BATCH_SIZE, progress=print_progress, commit: bool = True, workers: int | None = None) -> IngestStats:
+    """
+    Streams every file in `files` ({name: path}) through one transaction. Large
+    inputs are parsed on `workers` processes (see database/parser.py).
+    """
+    stats = IngestStats()
+    for key, fpath in files.items():
+        print(f"Parsing {key} file: {fpath}")
+
+    def all_rows():
+        for key, row in csv_parser.iter_rows(files, workers=workers):
+            stats.files[key] = stats.files.get(key, 0) + 1
+            yield row
+
+    ingest_rows(conn, all_rows(), batch_size=batch_size, progress=progress, commit=commit, stats=stats)
+    print(f"--- Ingested {stats} ---")
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description="Bulk-load ticket CSVs in the Assets format.")
+    parser.add_argument("paths", nargs="+", help="CSV files to ingest.")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: all cores).")
+    args = parser.parse_args()
+
+    db.ensure_db()
+    conn = db.get_connection()
+    ingest_files(conn, {os.path.basename(p): p for p in args.paths}, batch_size=args.batch_size, workers=args.workers)
+    conn.close()
@@ -0,0 +1,154 @@
+# Bulk parser for the Assets CSV format, working on whole chunks of a file at a time:
+# quote removal, line splitting and the check for padded fields run once per
+# chunk, issue types are matched through a first-character trie instead of a
+# startswith() loop over every issue, and large inputs are split on line
+# boundaries and spread over a process pool.
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Listing order matters: the first listed issue that prefixes the text wins.
+KNOWN_ISSUES = (
+    'Malware', 'Ransomware', 'Trojan', 'Phishing', 'DDoS',
+    'Server Failure', 'Network Down', 'VPN Access', 'Hardware', 'Software',
+    'Analytics', 'Data Cleaning', 'Model Training', 'Visualization', 'Dataset'
+)
+
+FIELDS = ("ticket_id", "date", "category", "issue_type", "description", "priority", "status")
+
+CHUNK_BYTES = 4 * 1024 * 1024
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024  # below this a pool costs more than it saves
+
+
+class IssueTrie:
+    """
+    Issue names indexed by first character, a one-level radix trie: match()
+    does one dict lookup and then a C-level startswith() against the few
+    names under that branch, instead of testing every known issue.
+    """
+
+    def __init__(self, issues=KNOWN_ISSUES):
+        self._branches: dict = {}
+        for issue in issues:  # listing order is kept within each branch
+            self._branches.setdefault(issue[:1], []).append(issue)
+
+    def match(self, text: str):
+        """The earliest-listed issue that `text` starts with, or None."""
+        for issue in self._branches.get(text[:1], ()):
+            if text.startswith(issue):
+                return issue
+        return None
+
+
+_TRIE = IssueTrie()
+
+
+# Whitespace other than the space that str.strip() would remove from an ASCII field.
+_ASCII_SPACE = frozenset('\t\x0b\x0c\x1c\x1d\x1e\x1f')
+
+
+def _padded(text: str) -> bool:
+    """True if some field in the block may have whitespace to strip."""
+    return not text.isascii() or ', ' in text or ' ,' in text or not _ASCII_SPACE.isdisjoint(text)
+
+
+def parse_text(text: str, skip_header: bool = False) -> list:
+    """Parses a block of whole lines into row tuples (see FIELDS)."""
+    # Text-mode reads translate \r\n and \r to \n; do the same, then split once.
+    text = text.replace('"', '').replace('\r\n', '\n').replace('\r', '\n')
+    lines = text.split('\n')
+    if skip_header:
+        lines = lines[1:]
+    # Exported blocks rarely pad their fields; then stripping each one is a no-op worth skipping.
+    strip_fields = _padded(text)
+
+    match = _TRIE.match
+    rows = []
+    for line in lines:
+        parts = line.strip().split(',')
+        if len(parts) < 5:
+            continue
+
+        cols = [p.strip() for p in parts] if strip_fields else parts
+        col2 = cols[2]
+        if col2 == "IT" or col2 == "IT Operations":
+            category, desc_start = "IT Operations", 4
+        elif col2 == "Cybersecurity":
+            category, desc_start = "Cybersecurity", 3
+        elif col2 == "Data" and cols[3] == "Science":
+            category, desc_start = "Data Science", 4
+        else:
+            category, desc_start = "Unknown", 2
+
+        full_desc = " ".join(cols[desc_start:-2])
+        issue = match(full_desc)
+        if issue is None:
+            issue_type, description = "Other", full_desc
+        else:
+            issue_type = issue
+            description = full_desc.replace(issue, "").strip().strip(',').strip() or full_desc
+
+        rows.append((parts[0], parts[1], category, issue_type, description, parts[-2], parts[-1]))
+    return rows
+
+
+def split_ranges(fpath: str, chunk_bytes: int = CHUNK_BYTES):
+    """Byte ranges of about `chunk_bytes` covering the file, each ending on a line boundary."""
+    size = os.path.getsize(fpath)
+    ranges, start = [], 0
+    with open(fpath, 'rb') as f:
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _parse_range(task):
+    fpath, start, end = task
+    with open(fpath, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    # The first line of every file is its header.
+    return parse_text(data.decode('utf-8'), skip_header=start == 0)
+
+
+def iter_rows(files: dict, workers: int | None = None, chunk_bytes: int = CHUNK_BYTES):
+    """
+    Yields (name, row dict) for every row of every file in `files` ({name: path}),
+    in file order. Inputs larger than PARALLEL_MIN_BYTES are parsed on a process
+    pool of `workers` (default: all cores); workers=1 always parses in-process.
+    """
+    tasks = [(key, (fpath, start, end)) for key, fpath in files.items() for start, end in split_ranges(fpath, chunk_bytes)]
+    total = sum(end - start for _, (_, start, end) in tasks)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or total < PARALLEL_MIN_BYTES:
+        for key, task in tasks:
+            for row in _parse_range(task):
+                yield key, dict(zip(FIELDS, row))
+        return
+
+    # Keep only a few chunks in flight so a slow consumer (the database) bounds memory.
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        queued = iter(tasks)
+        for key, task in queued:
+            pending.append((key, pool.submit(_parse_range, task)))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            key, future = pending.popleft()
+            for row in future.result():
+                yield key, dict(zip(FIELDS, row))
+            for key, task in queued:
+                pending.append((key, pool.submit(_parse_range, task)))
+                break
+
+
+def iter_file(fpath: str):
+    """Row dicts of one file, parsed in-process chunk by chunk."""
+    for _, row in iter_rows({fpath: fpath}, workers=1):
+        yield row
@@ -0,0 +1,96 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Applied to every pooled connection. journal_mode=WAL is persistent in the file,
+# the rest are per-connection.
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "busy_timeout": 30000,      # ms to wait for a lock; the only lock timeout, connect() gets none
+    "synchronous": "NORMAL",
+    "cache_size": -20000,       # ~20 MB page cache
+    "mmap_size": 268435456,     # 256 MB memory-mapped reads
+    "temp_store": "MEMORY",
+    # REPLACE conflict resolution only fires DELETE triggers (counters, cache versions) with this on.
+    "recursive_triggers": "ON",
+}
+
+
+def configure(conn: sqlite3.Connection) -> sqlite3.Connection:
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
+
+class ConnectionPool:
+    """A fixed-size, thread-safe pool of long-lived SQLite connections."""
+
+    def __init__(self, db_path: str, size: int = 8, timeout: float = 30.0):
+        self._db_path = db_path
+        self._size = size
+        self._timeout = timeout
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _new_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._db_path, check_same_thread=False)
+        return configure(conn)
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self._size:
+                self._created += 1
+                try:
+                    return self._new_connection()
+                except Exception:
+                    self._created -= 1
+                    raise
+
+        try:
+            return self._idle.get(timeout=self._timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No database connection free after {self._timeout}s (pool size {self._size})")
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        # Never hand the next borrower someone else's half-finished transaction.
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self) -> None:
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._created = 0
+
+
+_pools: dict = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """Returns the process-wide pool for a database file, creating it on first use."""
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(key)
+        return _pools[key]
@@ -0,0 +1,71 @@
+# Runs EXPLAIN QUERY PLAN over the queries the app issues and flags full table
+# scans, so a missing or unused index shows up before it reaches production:
+#
+#     python -m database.query_plan
+import sys
+import database.db as db
+
+TICKET_TABLES = ("it_tickets", "security_incidents", "data_science_projects")
+
+# (name, sql, params, scan_allowed). Keep in step with the queries in database/.
+QUERY_CATALOGUE = [
+    ("chat history", "SELECT id, sender, message FROM chat_logs WHERE username=? AND module=? ORDER BY id DESC LIMIT ?", ("admin", "IT", 50), False),
+    ("chat history page", "SELECT id, sender, message FROM chat_logs WHERE username=? AND module=? AND id < ? ORDER BY id DESC LIMIT ?", ("admin", "IT", 100, 50), False),
+    ("delete chat history", "DELETE FROM chat_logs WHERE username=? AND module=?", ("admin", "IT"), False),
+    ("ticket sequence", "UPDATE ticket_sequences SET next_id = next_id + ? WHERE tbl = ?", (1, "it_tickets"), False),
+    ("ticket counters", "SELECT priority, status, SUM(n) FROM ticket_counters WHERE dept = (SELECT id FROM departments WHERE tbl = ?) AND n > 0 GROUP BY priority, status", ("it_tickets",), False),
+    ("ticket counters, all departments", "SELECT d.name, c.priority, SUM(c.n) FROM ticket_counters c JOIN departments d ON d.id = c.dept WHERE c.n > 0 GROUP BY 1, 2", (), True),
+    ("search", "SELECT t.ticket_id, bm25(tickets_fts) AS score FROM tickets_fts JOIN tickets_labeled t ON t.id = tickets_fts.rowid WHERE tickets_fts MATCH ? ORDER BY score LIMIT ?", ('"printer"*', 20), False),
+]
+for _table in TICKET_TABLES:
+    QUERY_CATALOGUE += [
+        (f"{_table}: fetch all", f"SELECT * FROM {_table}", (), True),
+        (f"{_table}: by id", f"SELECT * FROM {_table} WHERE ticket_id = ?", ("TICK-1001",), False),
+        (f"{_table}: id prefix", f"SELECT ticket_id FROM {_table} WHERE ticket_id >= ? AND ticket_id < ? ORDER BY ticket_id LIMIT ?", ("TICK-4", "TICK-4\U0010ffff", 50), False),
+        (f"{_table}: update", f"UPDATE {_table} SET issue_type=?, description=?, priority=?, status=? WHERE ticket_id=?", ("x", "x", "x", "x", "TICK-1001"), False),
+        (f"{_table}: delete", f"DELETE FROM {_table} WHERE ticket_id=?", ("TICK-1001",), False),
+        (f"{_table}: first page", f"SELECT * FROM {_table} ORDER BY date DESC, ticket_id DESC LIMIT ?", (26,), False),
+        (f"{_table}: next page", f"SELECT * FROM {_table} WHERE (date, ticket_id) < (?, ?) ORDER BY date DESC, ticket_id DESC LIMIT ?", ("2024-06-01", "TICK-1001", 26), False),
+        (f"{_table}: page by status", f"SELECT * FROM {_table} WHERE status IN (?) ORDER BY date DESC, ticket_id DESC LIMIT ?", ("Open", 26), False),
+        (f"{_table}: by status and priority", f"SELECT COUNT(*) FROM {_table} WHERE status = ? AND priority = ?", ("Open", "High"), False),
+        (f"{_table}: by issue type", f"SELECT COUNT(*) FROM {_table} WHERE issue_type = ? AND status = ?", ("Malware", "Open"), False),
+        (f"{_table}: weekly counts", f"SELECT strftime('%Y-W%W', date) AS week, COUNT(*) FROM {_table} WHERE date IS NOT NULL GROUP BY week ORDER BY week DESC LIMIT ?", (8,), False),
+        (f"{_table}: oldest open", f"SELECT ticket_id, date FROM {_table} WHERE status NOT IN (?, ?) ORDER BY date ASC, ticket_id ASC LIMIT ?", ("Resolved", "Closed", 5), False),
+        (f"{_table}: date range", f"SELECT COUNT(*) FROM {_table} WHERE date >= ?", ("2024-01-01",), False),
+    ]
+
+
+def is_full_scan(detail: str, views=()) -> bool:
+    """
+    'SCAN t' without an index is a full table scan; 'SCAN t USING INDEX ...' walks an index in order.
+    'SCAN v' of a view after an UPDATE/DELETE through it walks the rows its INSTEAD OF trigger already found.
+    """
+    if not detail.startswith("SCAN ") or "INDEX" in detail:
+        return False
+    return detail.split()[1] not in views
+
+
+def check(conn, catalogue=QUERY_CATALOGUE):
+    """Returns [(name, plan_details, problems)] for every query in the catalogue."""
+    views = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'view'")}
+    results = []
+    for name, sql, params, scan_allowed in catalogue:
+        details = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        problems = [] if scan_allowed else [d for d in details if is_full_scan(d, views)]
+        results.append((name, details, problems))
+    return results
+
+
+if __name__ == "__main__":
+    conn = db.get_connection()
+    results = check(conn)
+    conn.close()
+
+    flagged = 0
+    for name, details, problems in results:
+        mark = "FULL SCAN" if problems else "ok"
+        print(f"[{mark:>9}] {name}: {' | '.join(details)}")
+        flagged += bool(problems)
+
+    print(f"\n{len(results)} queries checked, {flagged} flagged.")
+    sys.exit(1 if flagged else 0)
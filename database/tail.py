@@ -0,0 +1,142 @@
+# Follows the Assets CSV feeds and ingests only what was appended since the last
+# poll. The read position of each file lives in ingest_offsets and is committed
+# in the same transaction as the rows, so a restart resumes exactly where it
+# stopped. A file that shrank, changed inode or got a different first data row
+# was rotated or truncated and is read again from the top. Only lines ending in a
+# newline are ingested; a line still being written waits for the next poll.
+# seed_db records the position of every file it loads, so the first poll after a
+# seed picks up only what was appended since.
+#
+#     python -m database.tail              # follow the three Assets files
+#     python -m database.tail --once       # one pass, e.g. from cron
+import hashlib
+import os
+import time
+from datetime import datetime
+
+import database.db as db
+from database import ingest, parser
+
+POLL_INTERVAL = 1.0
+HEAD_BYTES = 4096
+
+
+def _head(f) -> str | None:
+    """
+    Hash of the first data row (the line after the header), used to notice a file
+    replaced in place; the header itself is the same in every rotation. None until
+    that row is complete.
+    """
+    f.seek(0)
+    f.readline()
+    line = f.readline(HEAD_BYTES)
+    if not line.endswith(b'\n') and len(line) < HEAD_BYTES:
+        return None
+    return hashlib.sha256(line).hexdigest()
+
+
+def _line_end(f, size: int) -> int:
+    """Offset just past the last newline before `size`."""
+    pos = size
+    while pos > 0:
+        start = max(0, pos - HEAD_BYTES)
+        f.seek(start)
+        i = f.read(pos - start).rfind(b'\n')
+        if i >= 0:
+            return start + i + 1
+        pos = start
+    return 0
+
+
+def snapshot(fpath: str) -> tuple:
+    """The (inode, head, offset, size) of `fpath` as it is now, for mark_read()."""
+    st = os.stat(fpath)
+    with open(fpath, 'rb') as f:
+        return st.st_ino, _head(f), _line_end(f, st.st_size), st.st_size
+
+
+def mark_read(conn, name: str, fpath: str, state: tuple) -> None:
+    """Records `state` (see snapshot()) as read, without committing."""
+    inode, head, offset, size = state
+    conn.execute(
+        "INSERT OR REPLACE INTO ingest_offsets VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (name, fpath, inode, head, offset, size, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    )
+
+
+def poll_file(conn, name: str, fpath: str) -> ingest.IngestStats | None:
+    """
+    Ingests the complete lines appended to `fpath` since the recorded offset. A
+    trailing line without a newline is left for a later poll, so a half-written
+    row never reaches the tables (or the label lists). Returns None when the file
+    is missing or unchanged.
+    """
+    try:
+        st = os.stat(fpath)
+    except FileNotFoundError:
+        return None
+
+    state = conn.execute("SELECT inode, head, offset, size FROM ingest_offsets WHERE name = ?", (name,)).fetchone()
+    with open(fpath, 'rb') as f:
+        head = _head(f)
+        inode, old_head, offset, size = state or (None, None, 0, -1)
+        rotated = old_head is not None and head != old_head
+        if state and (st.st_ino != inode or st.st_size < size or rotated):
+            print(f"{name}: rotated or truncated, reading from the start")
+            offset, size = 0, -1
+        if st.st_size == size:
+            return None
+
+        f.seek(offset)
+        data = f.read(st.st_size - offset)
+
+    complete = data.rfind(b'\n') + 1  # bytes up to and including the last newline
+    text = data[:complete].decode('utf-8', errors='replace')
+    rows = (dict(zip(parser.FIELDS, row)) for row in parser.parse_text(text, skip_header=offset == 0))
+
+    stats = ingest.ingest_rows(conn, rows, progress=None, commit=False)
+    mark_read(conn, name, fpath, (st.st_ino, head, offset + complete, st.st_size))
+    conn.commit()
+    return stats
+
+
+def poll(conn, files: dict) -> int:
+    """One pass over `files` ({name: path}); returns the number of rows ingested."""
+    total = 0
+    for name, fpath in files.items():
+        stats = poll_file(conn, name, fpath)
+        if stats is not None and stats.rows:
+            print(f"{name}: {stats}")
+            total += stats.rows
+    return total
+
+
+def follow(files: dict | None = None, interval: float = POLL_INTERVAL, once: bool = False):
+    """Polls `files` (default: the Assets CSVs) every `interval` seconds until interrupted."""
+    if files is None:
+        files = {key: db.resolve_asset(key, fpath) for key, fpath in db.FILES.items()}
+        files = {key: fpath for key, fpath in files.items() if fpath}
+
+    conn = db.get_connection()
+    try:
+        while True:
+            poll(conn, files)
+            if once:
+                return
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Ingest rows appended to the Assets CSV feeds.")
+    arg_parser.add_argument("paths", nargs="*", help="CSV files to follow (default: the Assets files).")
+    arg_parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="Seconds between polls.")
+    arg_parser.add_argument("--once", action="store_true", help="Ingest what is new and exit.")
+    args = arg_parser.parse_args()
+
+    follow({os.path.basename(p): p for p in args.paths} or None, interval=args.interval, once=args.once)
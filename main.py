@@ -1,10 +1,13 @@
 import streamlit as st
-import pandas as pd
 import altair as alt
 import time
 
 from services.auth_manager import AuthManager
 from services.database_manager import DatabaseManager
+import database.db as db
+from database import aggregates
+from models.ticket_browser import render_ticket_browser
+from services import instrumentation
 
 try:
     from models.security_incident import SecurityIncident
@@ -19,8 +22,12 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+instrumentation.start_rerun("main")
+
+db.ensure_db()
+
 if 'db_manager' not in st.session_state:
-    st.session_state.db_manager = DatabaseManager("database/app.db")
+    st.session_state.db_manager = DatabaseManager(db.DB_PATH)
 
 if 'auth_manager' not in st.session_state:
     st.session_state.auth_manager = AuthManager(st.session_state.db_manager)
@@ -28,39 +35,6 @@ if 'auth_manager' not in st.session_state:
 if 'user' not in st.session_state:
     st.session_state.user = None
 
-def get_unified_data():
-    """
-    Fetches data from all models and standardizes it for the master dashboard.
-    """
-    try:
-        df_cyber = SecurityIncident.get_all_incidents()
-        df_it = ITTicket.get_all_tickets()
-        df_data = Dataset.get_all_projects()
-    except Exception:
-        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
-
-    if not df_cyber.empty:
-        df_cyber['Department'] = 'Cyber Security'
-    if not df_it.empty:
-        df_it['Department'] = 'IT Operations'
-    if not df_data.empty:
-        df_data['Department'] = 'Data Analysis'
-
-    common_cols = ['Department', 'priority', 'status']
-    frames = []
-    
-    for df in [df_cyber, df_it, df_data]:
-        if not df.empty and set(common_cols).issubset(df.columns):
-            df['priority'] = df['priority'].str.title() 
-            df['status'] = df['status'].str.title()
-            frames.append(df[common_cols])
-            
-    if frames:
-        df_all = pd.concat(frames, ignore_index=True)
-        return df_all, df_cyber, df_data, df_it
-    
-    return pd.DataFrame(), df_cyber, df_data, df_it
-
 def login_page():
     st.title("Intelligence Platform")
     st.subheader("Authentication Required")
@@ -109,23 +83,26 @@ def home_dashboard():
     st.title("Overview Statistics")
     st.markdown("### Information")
 
-    df_all, df_cyber, df_data, df_it = get_unified_data()
-    total_records = len(df_all)
+    history = st.toggle("Include archived history", key="home_history")
+
+    # Grouped in SQL: one small (Department, priority, status, count) table feeds every tile and chart.
+    df_counts = aggregates.unified_counts(("priority", "status"), history=history)
+    total_records = aggregates.total(df_counts)
 
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Current Volume", total_records)
     
-    crit_count = len(df_all[df_all['priority'] == 'Critical']) if not df_all.empty else 0
+    crit_count = aggregates.total(df_counts, priority='Critical')
     col2.metric("Alerts", crit_count, delta="High Priority", delta_color="inverse")
     
-    resolved_count = len(df_all[df_all['status'].isin(['Resolved', 'Closed'])]) if not df_all.empty else 0
+    resolved_count = aggregates.total(df_counts, status=['Resolved', 'Closed'])
     col3.metric("Resolved", resolved_count, delta="Completed")
     
-    col4.metric("Categories", df_all['Department'].nunique() if not df_all.empty else 0)
+    col4.metric("Categories", df_counts['Department'].nunique() if not df_counts.empty else 0)
 
     st.divider()
 
-    if not df_all.empty:
+    if not df_counts.empty:
         priority_scale = alt.Scale(domain=['Critical', 'High', 'Medium', 'Low'], range=['#d62728', '#ff7f0e', '#fdbf11', '#2ca02c'])
         dept_scale = alt.Scale(scheme='tableau10')
 
@@ -133,21 +110,21 @@ def home_dashboard():
         
         with r1c1:
             st.subheader("1. Distribution by Category")
-            chart_donut = alt.Chart(df_all).mark_arc(innerRadius=60).encode(
-                theta=alt.Theta("count()", stack=True),
+            chart_donut = alt.Chart(aggregates.rollup(df_counts, 'Department')).mark_arc(innerRadius=60).encode(
+                theta=alt.Theta("count:Q", stack=True),
                 color=alt.Color("Department", scale=dept_scale),
-                tooltip=["Department", "count()"],
-                order=alt.Order("count()", sort="descending")
+                tooltip=["Department", "count:Q"],
+                order=alt.Order("count:Q", sort="descending")
             ).properties(height=300)
             st.altair_chart(chart_donut, use_container_width=True)
 
         with r1c2:
             st.subheader("2. Risk Profile")
-            chart_bar = alt.Chart(df_all).mark_bar().encode(
+            chart_bar = alt.Chart(aggregates.rollup(df_counts, 'priority')).mark_bar().encode(
                 x=alt.X('priority', sort=['Critical', 'High', 'Medium', 'Low'], title='Priority'),
-                y=alt.Y('count()', title='Ticket Count'),
+                y=alt.Y('count:Q', title='Ticket Count'),
                 color=alt.Color('priority', scale=priority_scale, legend=None),
-                tooltip=['priority', 'count()']
+                tooltip=['priority', 'count:Q']
             ).properties(height=300)
             st.altair_chart(chart_bar, use_container_width=True)
 
@@ -157,21 +134,21 @@ def home_dashboard():
 
         with r2c1:
             st.subheader("3. Status Graphs")
-            chart_stack = alt.Chart(df_all).mark_bar().encode(
+            chart_stack = alt.Chart(aggregates.rollup(df_counts, ['Department', 'status'])).mark_bar().encode(
                 y=alt.Y('Department', title=None),
-                x=alt.X('count()', title='Volume'),
+                x=alt.X('count:Q', title='Volume'),
                 color=alt.Color('status', title='Status', scale=alt.Scale(scheme='set2')),
-                tooltip=['Department', 'status', 'count()']
+                tooltip=['Department', 'status', 'count:Q']
             ).properties(height=300)
             st.altair_chart(chart_stack, use_container_width=True)
 
         with r2c2:
             st.subheader("4. Risk Map")
-            chart_heat = alt.Chart(df_all).mark_rect().encode(
+            chart_heat = alt.Chart(aggregates.rollup(df_counts, ['priority', 'status'])).mark_rect().encode(
                 x=alt.X('status', title='Status'),
                 y=alt.Y('priority', title='Priority', sort=['Critical', 'High', 'Medium', 'Low']),
-                color=alt.Color('count()', title='Density', scale=alt.Scale(scheme='reds')),
-                tooltip=['priority', 'status', 'count()']
+                color=alt.Color('count:Q', title='Density', scale=alt.Scale(scheme='reds')),
+                tooltip=['priority', 'status', 'count:Q']
             ).properties(height=300)
             st.altair_chart(chart_heat, use_container_width=True)
 
@@ -180,25 +157,22 @@ def home_dashboard():
 
 def cyber_page():
     st.title("Cyber Security Operations")
-    df = SecurityIncident.get_all_incidents()
-    if not df.empty:
-        st.dataframe(df, use_container_width=True)
+    if db.count_tickets(SecurityIncident.TABLE_NAME):
+        render_ticket_browser(SecurityIncident.TABLE_NAME, key="main_cyber")
     else:
         st.info("No cyber security data available.")
 
 def data_page():
     st.title("Data Analysis")
-    df = Dataset.get_all_projects()
-    if not df.empty:
-        st.dataframe(df, use_container_width=True)
+    if db.count_tickets(Dataset.TABLE_NAME):
+        render_ticket_browser(Dataset.TABLE_NAME, key="main_data")
     else:
         st.info("No data available.")
 
 def it_page():
     st.title("IT Operations Center")
-    df = ITTicket.get_all_tickets()
-    if not df.empty:
-        st.dataframe(df, use_container_width=True)
+    if db.count_tickets(ITTicket.TABLE_NAME):
+        render_ticket_browser(ITTicket.TABLE_NAME, key="main_it")
     else:
         st.info("No IT operations data available.")
 
@@ -218,6 +192,7 @@ def main_app():
         st.divider()
         
         if st.button("Logout", key="logout_main"):
+            db.flush_chat_messages()
             st.session_state.user = None
             st.rerun()
 
@@ -234,4 +209,5 @@ if __name__ == "__main__":
     if st.session_state.user:
         main_app()
     else:
-        login_page()
\ No newline at end of file
+        login_page()
+    instrumentation.render_panel()
\ No newline at end of file
@@ -1,10 +1,19 @@
 import streamlit as st
-from openai import OpenAI
 import database.db as db
 import pandas as pd
+import re
+import json
+import weakref
+
+from services import instrumentation, llm_cache, llm_client
+from services.conversation_memory import ConversationMemory, count_tokens
+
+MODEL = "gpt-3.5-turbo"
 
 try:
-    client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+    # OPENAI_BASE_URL is optional, e.g. to point at a local stub of the chat-completions API.
+    # Shared across sessions: one concurrency limit, rate limit and retry policy for every chat.
+    client = llm_client.get_client(api_key=st.secrets["OPENAI_API_KEY"], base_url=st.secrets.get("OPENAI_BASE_URL"))
 except Exception as e:
     client = None
 
@@ -17,28 +26,101 @@ def get_current_username():
         return user_obj
     return "guest"
 
-def get_data_context(module_name):
-    table_map = {
-        "IT": "it_tickets",
-        "CYBER": "security_incidents",
-        "DATASCI": "data_science_projects"
-    }
-    
-    target_table = table_map.get(module_name)
+CONTEXT_ROWS = 20
+CONTEXT_TOKEN_BUDGET = 1500
+CONTEXT_COLUMNS = ["ticket_id", "date", "issue_type", "description", "priority", "status"]
+
+# Words that would match almost every ticket and add nothing to the ranking.
+STOPWORDS = {
+    "a", "an", "and", "any", "are", "about", "all", "can", "do", "does", "for", "from", "give", "have",
+    "how", "i", "in", "is", "it", "list", "me", "many", "of", "on", "or", "show", "the", "there", "to",
+    "us", "was", "were", "what", "when", "where", "which", "who", "why", "with", "you"
+}
+
+def select_context_rows(table_name, prompt, top_k=CONTEXT_ROWS):
+    """
+    The tickets most relevant to the prompt, ranked by the FTS5 bm25 index that the
+    database keeps up to date on every write; topped up with the newest tickets.
+    """
+    words = [w for w in re.findall(r"\w+", prompt or "") if w.lower() not in STOPWORDS]
+    df = db.search(" ".join(words), table_name, limit=top_k, match_any=True) if words else pd.DataFrame()
+    if len(df) < top_k:
+        recent, _ = db.fetch_page(table_name, top_k)
+        seen = set(df["ticket_id"]) if not df.empty else set()
+        recent = recent[~recent["ticket_id"].isin(seen)].head(top_k - len(df))
+        df = pd.concat([df, recent], ignore_index=True) if not df.empty else recent
+    return df
+
+@instrumentation.timed("pandas")
+def get_data_context(module_name, prompt=None, top_k=CONTEXT_ROWS, token_budget=CONTEXT_TOKEN_BUDGET):
+    target_table = db.MODULE_TABLES.get(module_name)
     
     if target_table:
         try:
-            
-            df = db.fetch_all(target_table)
-            
+            df = select_context_rows(target_table, prompt, top_k)
+
             if not df.empty:
-                
-                return df.tail(20).to_csv(index=False)
+                lines = [",".join(CONTEXT_COLUMNS)]
+                used = count_tokens(lines[0])
+                for row in df[CONTEXT_COLUMNS].itertuples(index=False):
+                    line = ",".join(str(v) for v in row)
+                    cost = count_tokens(line)
+                    if used + cost > token_budget:
+                        break
+                    lines.append(line)
+                    used += cost
+                return "\n".join(lines)
         except Exception as e:
             return f"Error loading data: {e}"
             
     return "No data available."
 
+def _format_counts(df, column):
+    df = df.sort_values("count", ascending=False)
+    return ", ".join(f"{v if v else 'Unknown'} {c}" for v, c in zip(df[column], df["count"]))
+
+def build_data_digest(module_name):
+    """
+    Exact whole-table statistics for the assistant, computed in SQL: counts by
+    priority/status/type, weekly volume and the oldest open items. Cached until
+    the table is written to.
+    """
+    target_table = db.MODULE_TABLES.get(module_name)
+    if not target_table:
+        return "No data available."
+
+    def build():
+        total = db.count_tickets(target_table)
+        if not total:
+            return "No tickets recorded."
+        closed = db.count_tickets(target_table, status=list(db.OPEN_EXCLUDED_STATUSES))
+        lines = [
+            f"Total tickets: {total} (open: {total - closed}, resolved/closed: {closed})",
+            f"By priority: {_format_counts(db.count_by(target_table, ['priority']), 'priority')}",
+            f"By status: {_format_counts(db.count_by(target_table, ['status']), 'status')}",
+            f"By type: {_format_counts(db.count_by(target_table, ['issue_type']), 'issue_type')}",
+        ]
+        weekly = db.weekly_counts(target_table)
+        if not weekly.empty:
+            lines.append("Tickets per week (newest first): " + ", ".join(f"{w} {c}" for w, c in zip(weekly["week"], weekly["count"])))
+        oldest = db.oldest_open(target_table)
+        if not oldest.empty:
+            lines.append("Oldest open tickets: " + "; ".join(
+                f"{r.ticket_id} ({r.date}, {r.issue_type}, {r.priority}, {r.status})" for r in oldest.itertuples()
+            ))
+        return "\n".join(lines)
+
+    try:
+        return db.cache.get(target_table, "ai_digest", build)
+    except Exception as e:
+        return f"Error building summary: {e}"
+
+class _SessionFlush:
+    """Lives in session_state; when Streamlit drops the session, its queued chat messages are flushed."""
+
+    def __init__(self):
+        weakref.finalize(self, db.flush_chat_messages)
+
 def render_chat_interface(module_name):
     st.subheader(f"{module_name} AI Assistant")
 
@@ -48,8 +130,17 @@ def render_chat_interface(module_name):
 
     username = get_current_username()
 
+    if "_chat_flush" not in st.session_state:
+        st.session_state._chat_flush = _SessionFlush()
+
     if "messages" not in st.session_state:
-        st.session_state.messages = db.get_chat_history(username, module_name)
+        rows = db.get_chat_history(username, module_name)
+        st.session_state.messages = [{"id": i, "sender": s, "message": m} for i, s, m in rows]
+        # Smallest id shown so far; None once there is nothing earlier to load.
+        st.session_state.chat_cursor = rows[0][0] if len(rows) == db.CHAT_PAGE_SIZE else None
+        st.session_state.chat_memory = ConversationMemory.from_history(
+            [{"role": "user" if m["sender"] == "user" else "assistant", "content": m["message"]} for m in st.session_state.messages]
+        )
 
     with st.sidebar:
         st.title("Chat Controls")
@@ -58,6 +149,15 @@ def render_chat_interface(module_name):
         if st.button("Clear History", type="primary", use_container_width=True):
             db.delete_chat_history(username, module_name)
             st.session_state.messages = []
+            st.session_state.chat_cursor = None
+            st.session_state.chat_memory.clear()
+            st.rerun()
+
+    if st.session_state.get("chat_cursor") is not None:
+        if st.button("Load earlier messages", key=f"chat_earlier_{module_name}"):
+            rows = db.get_chat_history(username, module_name, before_id=st.session_state.chat_cursor)
+            st.session_state.messages[:0] = [{"id": i, "sender": s, "message": m} for i, s, m in rows]
+            st.session_state.chat_cursor = rows[0][0] if len(rows) == db.CHAT_PAGE_SIZE else None
             st.rerun()
 
     for msg in st.session_state.messages:
@@ -74,17 +174,24 @@ def render_chat_interface(module_name):
         db.save_chat_message(username, module_name, "user", prompt)
 
         
-        data_context = get_data_context(module_name)
+        data_context = get_data_context(module_name, prompt)
+        data_digest = build_data_digest(module_name)
         
         with st.chat_message("assistant", avatar=None):
-            response_text = st.write_stream(
-                stream_generator(module_name, prompt, st.session_state.messages, data_context)
-            )
+            try:
+                response_text = st.write_stream(
+                    stream_generator(module_name, prompt, st.session_state.chat_memory, data_context, data_digest)
+                )
+            except llm_client.LLMError as e:
+                st.warning(str(e))
+                return
         
+        st.session_state.chat_memory.add("user", prompt)
+        st.session_state.chat_memory.add("assistant", response_text)
         st.session_state.messages.append({"sender": "assistant", "message": response_text})
         db.save_chat_message(username, module_name, "assistant", response_text)
 
-def stream_generator(module_name, new_prompt, history, data_context):
+def stream_generator(module_name, new_prompt, history, data_context, data_digest=None):
     base_personas = {
         "IT": "You are an IT Support Specialist.",
         "CYBER": "You are a Cyber Security Analyst.",
@@ -94,28 +201,31 @@ def stream_generator(module_name, new_prompt, history, data_context):
     system_instr = f"""
     {base_personas.get(module_name, "You are a helpful assistant.")}
     
-    You have access to the following LIVE DATA from the database (last 20 entries):
+    EXACT STATISTICS for the whole table, computed from the database:
+    ---
+    {data_digest or "Not available."}
+    ---
+    You also have the following LIVE DATA from the database (the entries most relevant to the question):
     ---
     {data_context}
     ---
     Answer the user's question based on this data. 
-    If they ask for stats (count, average), calculate them from the data above.
+    For counts, totals and trends use the exact statistics above; do not recount them from the entries.
     """
     
+    # `history` is the session's ConversationMemory; a plain list of {sender, message} also works.
+    if not isinstance(history, ConversationMemory):
+        history = ConversationMemory.from_history(
+            [{"role": "user" if m["sender"] == "user" else "assistant", "content": m["message"]} for m in history]
+        )
+
     api_messages = [{"role": "system", "content": system_instr}]
-    
-    for m in history[-10:]:
-        role = "user" if m["sender"] == "user" else "assistant"
-        api_messages.append({"role": role, "content": m["message"]})
-    
+    api_messages += history.messages()
     api_messages.append({"role": "user", "content": new_prompt})
 
-    stream = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=api_messages,
-        stream=True,
-    )
-    
-    for chunk in stream:
-        if chunk.choices[0].delta.content is not None:
-            yield chunk.choices[0].delta.content
\ No newline at end of file
+    def produce():
+        yield from client.stream(MODEL, api_messages)
+
+    # Everything except the new question (persona, data, history) forms the cache context.
+    context = json.dumps(api_messages[:-1], sort_keys=True)
+    yield from llm_cache.cached_stream(MODEL, new_prompt, context, produce)
@@ -7,6 +7,14 @@ class Dataset:
     def get_all_projects():
         return db.fetch_all(Dataset.TABLE_NAME)
 
+    @staticmethod
+    def get_by_id(ticket_id):
+        return db.fetch_by_id(Dataset.TABLE_NAME, ticket_id)
+
+    @staticmethod
+    def find_ids(prefix="", limit=50):
+        return db.find_ids(Dataset.TABLE_NAME, prefix, limit)
+
     @staticmethod
     def create_project(issue_type, description, priority, status):
         db.add_entry(Dataset.TABLE_NAME, issue_type, description, priority, status)
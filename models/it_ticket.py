@@ -7,6 +7,14 @@ class ITTicket:
     def get_all_tickets():
         return db.fetch_all(ITTicket.TABLE_NAME)
 
+    @staticmethod
+    def get_by_id(ticket_id):
+        return db.fetch_by_id(ITTicket.TABLE_NAME, ticket_id)
+
+    @staticmethod
+    def find_ids(prefix="", limit=50):
+        return db.find_ids(ITTicket.TABLE_NAME, prefix, limit)
+
     @staticmethod
     def create_ticket(issue_type, description, priority, status):
         db.add_entry(ITTicket.TABLE_NAME, issue_type, description, priority, status)
@@ -7,6 +7,14 @@ class SecurityIncident:
     def get_all_incidents():
         return db.fetch_all(SecurityIncident.TABLE_NAME)
 
+    @staticmethod
+    def get_by_id(ticket_id):
+        return db.fetch_by_id(SecurityIncident.TABLE_NAME, ticket_id)
+
+    @staticmethod
+    def find_ids(prefix="", limit=50):
+        return db.find_ids(SecurityIncident.TABLE_NAME, prefix, limit)
+
     @staticmethod
     def log_incident(issue_type, description, priority, status):
         db.add_entry(SecurityIncident.TABLE_NAME, issue_type, description, priority, status)
@@ -0,0 +1,58 @@
+import streamlit as st
+import database.db as db
+
+PAGE_SIZE = 25
+
+
+def _options(table_name, column):
+    counts = db.count_by(table_name, [column])
+    return sorted(v for v in counts[column].dropna().tolist() if v)
+
+
+def render_ticket_browser(table_name, key, page_size=PAGE_SIZE):
+    """
+    Filterable ticket table that only reads the page on screen.
+    Paging is keyset-based, so page 1000 costs the same as page 1.
+    """
+    f1, f2, f3 = st.columns(3)
+    priority = f1.multiselect("Priority", _options(table_name, "priority"), key=f"{key}_priority")
+    status = f2.multiselect("Status", _options(table_name, "status"), key=f"{key}_status")
+    issue_type = f3.multiselect("Type", _options(table_name, "issue_type"), key=f"{key}_issue_type")
+    filters = {"priority": priority, "status": status, "issue_type": issue_type}
+
+    # Cursor of every page visited so far; changing a filter starts over.
+    state_key = f"{key}_cursors"
+    filter_key = (tuple(priority), tuple(status), tuple(issue_type))
+    if st.session_state.get(f"{key}_filters") != filter_key:
+        st.session_state[f"{key}_filters"] = filter_key
+        st.session_state[state_key] = [None]
+    cursors = st.session_state[state_key]
+
+    df, next_cursor = db.fetch_page(table_name, page_size, cursors[-1], **filters)
+    if df.empty:
+        st.info("No matching records.")
+        return
+
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+    matching = db.count_tickets(table_name, **{k: v for k, v in filters.items() if v})
+    c1, c2, c3 = st.columns([1, 1, 4])
+    if c1.button("Previous", key=f"{key}_prev", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    if c2.button("Next", key=f"{key}_next", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
+    c3.caption(f"Page {len(cursors)} of {max(1, -(-matching // page_size))} · {matching} records")
+
+
+def render_search(table_name, key, limit=50):
+    """Keyword search box over descriptions and types, ranked by relevance."""
+    query = st.text_input("Search", placeholder="e.g. VPN remote IP", key=f"{key}_search")
+    if not query:
+        return
+    results = db.search(query, table_name, limit=limit)
+    if results.empty:
+        st.info("No matches.")
+    else:
+        st.dataframe(results.drop(columns=["source", "score"]), use_container_width=True, hide_index=True)
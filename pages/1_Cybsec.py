@@ -2,9 +2,14 @@ import streamlit as st
 import altair as alt
 from models.security_incident import SecurityIncident
 from models import GPT
+from database import aggregates
+from models.ticket_browser import render_ticket_browser, render_search
+from services import instrumentation
 
 ISSUE_TYPES = ["Malware", "Phishing", "Ransomware", "DDoS", "Trojan", "Other"]
 
+instrumentation.start_rerun("Cybsec")
+
 if 'user' not in st.session_state or st.session_state.user is None:
     st.warning("Please log in.")
     st.stop()
@@ -12,41 +17,43 @@ if 'user' not in st.session_state or st.session_state.user is None:
 st.title("Cybersecurity Operations")
 action = st.selectbox("Action", ["View Dashboard", "Log Incident", "Update Incident", "Delete Incident", "AI Assistant"])
 
-df = SecurityIncident.get_all_incidents()
-
 if action == "View Dashboard":
-    if not df.empty:
+    history = st.toggle("Include archived history", key="cyber_history")
+    counts = aggregates.table_counts(SecurityIncident.TABLE_NAME, history=history)
+    if not counts.empty:
 
         st.subheader("Live Data")
         
         col1, col2 = st.columns(2)
         with col1:
 
-            chart_bar = alt.Chart(df).mark_bar().encode(
+            chart_bar = alt.Chart(aggregates.rollup(counts, 'issue_type')).mark_bar().encode(
                 x=alt.X('issue_type', sort='-y', title='Threat Type'),
-                y=alt.Y('count()', title='Frequency'),
+                y=alt.Y('count:Q', title='Frequency'),
                 color=alt.Color('issue_type', scale=alt.Scale(scheme='reds'), legend=None),
-                tooltip=['issue_type', 'count()']
+                tooltip=['issue_type', 'count:Q']
             ).properties(height=300, title="Threat Frequency")
             st.altair_chart(chart_bar, use_container_width=True)
 
         with col2:
-            chart_pie = alt.Chart(df).mark_arc(innerRadius=60).encode(
-                theta=alt.Theta("count()"),
+            chart_pie = alt.Chart(aggregates.rollup(counts, 'priority')).mark_arc(innerRadius=60).encode(
+                theta=alt.Theta("count:Q"),
                 color=alt.Color("priority", scale=alt.Scale(domain=['Low', 'Medium', 'High', 'Critical'], range=['#2ecc71', '#f1c40f', '#e67e22', '#e74c3c'])),
-                tooltip=["priority", "count()"]
+                tooltip=["priority", "count:Q"]
             ).properties(height=300, title="Severity Distribution")
             st.altair_chart(chart_pie, use_container_width=True)
 
         st.divider()
 
         m1, m2, m3 = st.columns(3)
-        m1.metric("Critical Threats", len(df[df['priority'] == 'Critical']))
-        m2.metric("Active Incidents", len(df[df['status'] != 'Resolved']))
-        m3.metric("Total Logs", len(df))
+        total = aggregates.total(counts)
+        m1.metric("Critical Threats", aggregates.total(counts, priority='Critical'))
+        m2.metric("Active Incidents", total - aggregates.total(counts, status='Resolved'))
+        m3.metric("Total Logs", total)
         
         with st.expander("View Incident Logs", expanded=True):
-            st.dataframe(df, use_container_width=True)
+            render_search(SecurityIncident.TABLE_NAME, key="cyber_logs")
+            render_ticket_browser(SecurityIncident.TABLE_NAME, key="cyber_logs")
 
     else:
         st.info("No incidents found.")
@@ -64,26 +71,33 @@ elif action == "Log Incident":
             st.rerun()
 
 elif action == "Update Incident":
-    ticket = st.selectbox("Select ID", df['ticket_id'])
+    prefix = st.text_input("Search ID", placeholder="TICK-")
+    ticket = st.selectbox("Select ID", SecurityIncident.find_ids(prefix))
     if ticket:
-        row = df[df['ticket_id'] == ticket].iloc[0]
+        row = SecurityIncident.get_by_id(ticket)
+        if row is None:
+            st.warning("Ticket not found.")
+            st.stop()
         with st.form("edit_form"):
             idx_issue = ISSUE_TYPES.index(row['issue_type']) if row['issue_type'] in ISSUE_TYPES else 0
             e_issue = st.selectbox("Type", ISSUE_TYPES, index=idx_issue)
             e_desc = st.text_area("Description", value=row['description'])
             p_opts = ["Low", "Medium", "High", "Critical"]
-            e_prio = st.selectbox("Priority", p_opts, index=p_opts.index(row['priority']))
+            e_prio = st.selectbox("Priority", p_opts, index=p_opts.index(row['priority']) if row['priority'] in p_opts else 0)
             s_opts = ["Open", "In Progress", "Resolved"]
-            e_stat = st.selectbox("Status", s_opts, index=s_opts.index(row['status']))
+            e_stat = st.selectbox("Status", s_opts, index=s_opts.index(row['status']) if row['status'] in s_opts else 0)
             if st.form_submit_button("Update"):
                 SecurityIncident.update_incident(ticket, e_issue, e_desc, e_prio, e_stat)
                 st.success("Updated!")
                 st.rerun()
 
 elif action == "Delete Incident":
-    ticket = st.selectbox("Select ID", df['ticket_id'])
+    prefix = st.text_input("Search ID", placeholder="TICK-")
+    ticket = st.selectbox("Select ID", SecurityIncident.find_ids(prefix))
     if st.button(f"Confirm Delete {ticket}", type="primary"):
         SecurityIncident.delete_incident(ticket)
         st.rerun()
 elif action == "AI Assistant":
-    GPT.render_chat_interface("CYBER")
\ No newline at end of file
+    GPT.render_chat_interface("CYBER")
+
+instrumentation.render_panel()
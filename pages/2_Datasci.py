@@ -2,10 +2,15 @@ import streamlit as st
 import altair as alt
 from models.dataset import Dataset
 from models import GPT
+from database import aggregates
+from models.ticket_browser import render_ticket_browser, render_search
+from services import instrumentation
 
 
 ISSUE_TYPES = ["Analytics", "Data Cleaning", "Model Training", "Visualization", "Dataset", "Other"]
 
+instrumentation.start_rerun("Datasci")
+
 if 'user' not in st.session_state or st.session_state.user is None:
     st.warning("Please log in.")
     st.stop()
@@ -13,24 +18,24 @@ if 'user' not in st.session_state or st.session_state.user is None:
 st.title("Data Science Projects")
 action = st.selectbox("Manage Projects", ["View Dashboard", "Create Project", "Update Project", "Delete Project", "AI Assistant"])
 
-df = Dataset.get_all_projects()
-
 if action == "View Dashboard":
-    if not df.empty:
+    history = st.toggle("Include archived history", key="datasci_history")
+    counts = aggregates.table_counts(Dataset.TABLE_NAME, history=history)
+    if not counts.empty:
         st.subheader("Project Analytics")
         
-        base = alt.Chart(df).encode(
+        base = alt.Chart(aggregates.rollup(counts, ['status', 'issue_type'])).encode(
             x=alt.X('status', title='Status'),
             y=alt.Y('issue_type', title='Project Category')
         )
 
         heatmap = base.mark_rect().encode(
-            color=alt.Color('count()', title='Count', scale=alt.Scale(scheme='viridis')),
-            tooltip=['issue_type', 'status', 'count()']
+            color=alt.Color('count:Q', title='Count', scale=alt.Scale(scheme='viridis')),
+            tooltip=['issue_type', 'status', 'count:Q']
         )
 
         text = base.mark_text().encode(
-            text='count()',
+            text='count:Q',
             color=alt.value('white')  
         )
 
@@ -44,11 +49,13 @@ if action == "View Dashboard":
         st.divider()
 
         c1, c2 = st.columns(2)
-        c1.metric("Total Projects", len(df))
-        c2.metric("Active Tickets", len(df[df['status'] != 'Resolved']))
+        total = aggregates.total(counts)
+        c1.metric("Total Projects", total)
+        c2.metric("Active Tickets", total - aggregates.total(counts, status='Resolved'))
         
         with st.expander("View Project Details", expanded=True):
-            st.dataframe(df, use_container_width=True)
+            render_search(Dataset.TABLE_NAME, key="datasci_logs")
+            render_ticket_browser(Dataset.TABLE_NAME, key="datasci_logs")
 
     else:
         st.info("No projects found.")
@@ -65,26 +72,33 @@ elif action == "Create Project":
             st.rerun()
 
 elif action == "Update Project":
-    ticket = st.selectbox("Select Project", df['ticket_id'])
+    prefix = st.text_input("Search ID", placeholder="TICK-")
+    ticket = st.selectbox("Select Project", Dataset.find_ids(prefix))
     if ticket:
-        row = df[df['ticket_id'] == ticket].iloc[0]
+        row = Dataset.get_by_id(ticket)
+        if row is None:
+            st.warning("Ticket not found.")
+            st.stop()
         with st.form("edit_form"):
             idx_issue = ISSUE_TYPES.index(row['issue_type']) if row['issue_type'] in ISSUE_TYPES else 0
             e_issue = st.selectbox("Category", ISSUE_TYPES, index=idx_issue)
             e_desc = st.text_area("Description", value=row['description'])
             p_opts = ["Low", "Medium", "High", "Critical"]
-            e_prio = st.selectbox("Priority", p_opts, index=p_opts.index(row['priority']))
+            e_prio = st.selectbox("Priority", p_opts, index=p_opts.index(row['priority']) if row['priority'] in p_opts else 0)
             s_opts = ["Open", "In Progress", "Resolved"]
-            e_stat = st.selectbox("Status", s_opts, index=s_opts.index(row['status']))
+            e_stat = st.selectbox("Status", s_opts, index=s_opts.index(row['status']) if row['status'] in s_opts else 0)
             if st.form_submit_button("Update"):
                 Dataset.update_project(ticket, e_issue, e_desc, e_prio, e_stat)
                 st.success("Updated!")
                 st.rerun()
 
 elif action == "Delete Project":
-    ticket = st.selectbox("Select Project", df['ticket_id'])
+    prefix = st.text_input("Search ID", placeholder="TICK-")
+    ticket = st.selectbox("Select Project", Dataset.find_ids(prefix))
     if st.button(f"Delete {ticket}", type="primary"):
         Dataset.delete_project(ticket)
         st.rerun()
 elif action == "AI Assistant":
-    GPT.render_chat_interface("DATASCI")
\ No newline at end of file
+    GPT.render_chat_interface("DATASCI")
+
+instrumentation.render_panel()
@@ -2,10 +2,15 @@ import streamlit as st
 import altair as alt
 from models.it_ticket import ITTicket
 from models import GPT
+from database import aggregates
+from models.ticket_browser import render_ticket_browser, render_search
+from services import instrumentation
 
 
 ISSUE_TYPES = ["Server Failure", "Network Down", "VPN Access", "Hardware", "Software", "Other"]
 
+instrumentation.start_rerun("IT")
+
 if 'user' not in st.session_state or st.session_state.user is None:
     st.warning("Please log in.")
     st.stop()
@@ -13,10 +18,10 @@ if 'user' not in st.session_state or st.session_state.user is None:
 st.title("IT Operations")
 action = st.selectbox("Action", ["View Dashboard", "Create Ticket", "Update Ticket", "Delete Ticket", "AI Assistant"])
 
-df = ITTicket.get_all_tickets()
-
 if action == "View Dashboard":
-    if not df.empty:
+    history = st.toggle("Include archived history", key="it_history")
+    counts = aggregates.table_counts(ITTicket.TABLE_NAME, history=history)
+    if not counts.empty:
         st.subheader("Systems Status Analytics")
         
         c1, c2 = st.columns(2)
@@ -24,8 +29,8 @@ if action == "View Dashboard":
         with c1:
             st.markdown("### Common Issues")
             
-            base = alt.Chart(df).encode(
-                x=alt.X('count()', title='Ticket Count'),
+            base = alt.Chart(aggregates.rollup(counts, 'issue_type')).encode(
+                x=alt.X('count:Q', title='Ticket Count'),
                 y=alt.Y('issue_type', sort='-x', title='Issue Type')
             )
             
@@ -36,29 +41,30 @@ if action == "View Dashboard":
             
             circle = base.mark_circle(size=100).encode(
                 color=alt.Color('issue_type', legend=None),
-                tooltip=['issue_type', 'count()']
+                tooltip=['issue_type', 'count:Q']
             )
             
             st.altair_chart(rule + circle, use_container_width=True)
 
         with c2:
             st.markdown("### Resolution Chart")
-            chart_pie = alt.Chart(df).mark_arc(innerRadius=50).encode(
-                theta=alt.Theta("count()"),
+            chart_pie = alt.Chart(aggregates.rollup(counts, 'status')).mark_arc(innerRadius=50).encode(
+                theta=alt.Theta("count:Q"),
                 color=alt.Color("status", scale=alt.Scale(scheme='category10')),
-                tooltip=["status", "count()"]
+                tooltip=["status", "count:Q"]
             ).properties(height=300)
             st.altair_chart(chart_pie, use_container_width=True)
             
         st.divider()
 
         m1, m2, m3 = st.columns(3)
-        m1.metric("Total Tickets", len(df))
-        m2.metric("High Priority", len(df[df['priority'].isin(['High', 'Critical'])]))
-        m3.metric("Resolved", len(df[df['status'] == 'Resolved']))
+        m1.metric("Total Tickets", aggregates.total(counts))
+        m2.metric("High Priority", aggregates.total(counts, priority=['High', 'Critical']))
+        m3.metric("Resolved", aggregates.total(counts, status='Resolved'))
 
         with st.expander("View Ticket Records", expanded=True):
-            st.dataframe(df, use_container_width=True)
+            render_search(ITTicket.TABLE_NAME, key="it_logs")
+            render_ticket_browser(ITTicket.TABLE_NAME, key="it_logs")
 
     else:
         st.info("No tickets found.")
@@ -75,26 +81,33 @@ elif action == "Create Ticket":
             st.rerun()
 
 elif action == "Update Ticket":
-    ticket = st.selectbox("Select Ticket", df['ticket_id'])
+    prefix = st.text_input("Search ID", placeholder="TICK-")
+    ticket = st.selectbox("Select Ticket", ITTicket.find_ids(prefix))
     if ticket:
-        row = df[df['ticket_id'] == ticket].iloc[0]
+        row = ITTicket.get_by_id(ticket)
+        if row is None:
+            st.warning("Ticket not found.")
+            st.stop()
         with st.form("edit_form"):
             idx_issue = ISSUE_TYPES.index(row['issue_type']) if row['issue_type'] in ISSUE_TYPES else 0
             e_issue = st.selectbox("Issue", ISSUE_TYPES, index=idx_issue)
             e_desc = st.text_area("Description", value=row['description'])
             p_opts = ["Low", "Medium", "High", "Critical"]
-            e_prio = st.selectbox("Priority", p_opts, index=p_opts.index(row['priority']))
+            e_prio = st.selectbox("Priority", p_opts, index=p_opts.index(row['priority']) if row['priority'] in p_opts else 0)
             s_opts = ["Open", "In Progress", "Resolved"]
-            e_stat = st.selectbox("Status", s_opts, index=s_opts.index(row['status']))
+            e_stat = st.selectbox("Status", s_opts, index=s_opts.index(row['status']) if row['status'] in s_opts else 0)
             if st.form_submit_button("Update"):
                 ITTicket.update_ticket(ticket, e_issue, e_desc, e_prio, e_stat)
                 st.success("Updated!")
                 st.rerun()
 
 elif action == "Delete Ticket":
-    ticket = st.selectbox("Select Ticket", df['ticket_id'])
+    prefix = st.text_input("Search ID", placeholder="TICK-")
+    ticket = st.selectbox("Select Ticket", ITTicket.find_ids(prefix))
     if st.button(f"Delete {ticket}", type="primary"):
         ITTicket.delete_ticket(ticket)
         st.rerun()
 elif action == "AI Assistant":
-    GPT.render_chat_interface("IT")
\ No newline at end of file
+    GPT.render_chat_interface("IT")
+
+instrumentation.render_panel()
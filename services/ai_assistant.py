@@ -1,34 +1,42 @@
 import os
+import json
 from typing import List, Dict, Optional
-from openai import OpenAI
+
+from services import llm_cache, llm_client
+from services.conversation_memory import ConversationMemory
 
 class AIAssistant:
 
-    def __init__(self, system_prompt: str = "You are a helpful assistant", api_key: str = ""):
+    MODEL = 'gpt-4o'
+
+    def __init__(self, system_prompt: str = "You are a helpful assistant", api_key: str = "", base_url: Optional[str] = None):
         self._system_prompt = system_prompt
         
-        self.client = OpenAI(api_key='-'
-                             )
+        self.client = llm_client.get_client(api_key=api_key or os.environ.get("OPENAI_API_KEY", "-"),
+                                            base_url=base_url or os.environ.get("OPENAI_BASE_URL")
+                                            )
         
-        self._history: List[Dict[str, str]] = [
-            {'role': 'system', 'content': system_prompt}
-        ]
+        self._memory = ConversationMemory()
+
+    @property
+    def _history(self) -> List[Dict[str, str]]:
+        return [{'role': 'system', 'content': self._system_prompt}] + self._memory.messages()
 
     def send_message(self, user_message: str) -> str:
         
-        self._history.append({'role': 'user', 'content': user_message})
+        messages = self._history + [{'role': 'user', 'content': user_message}]
+        context = json.dumps(messages[:-1], sort_keys=True)
 
-        try:
-            response = self.client.chat.completions.create(
-                model='gpt-4o',
-                messages=self._history
-            )
+        def produce() -> str:
+            return self.client.complete(self.MODEL, messages)
 
-            ai_text = response.choices[0].message.content
+        try:
+            ai_text = llm_cache.cached_completion(self.MODEL, user_message, context, produce)
 
-            self._history.append({'role': 'assistant', 'content': ai_text})
+            self._memory.add('user', user_message)
+            self._memory.add('assistant', ai_text)
             
             return ai_text
 
         except Exception as e:
-            return f"Error: {e}"
\ No newline at end of file
+            return f"Error: {e}"
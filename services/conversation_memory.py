@@ -0,0 +1,91 @@
+import re
+from typing import Callable, Dict, List, Optional
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken when it is installed, otherwise ~4 characters per token."""
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return len(text) // 4 + 1
+
+
+def _first_sentence(text: str, max_words: int = 30) -> str:
+    sentence = re.split(r"(?<=[.!?])\s", text.strip(), maxsplit=1)[0]
+    words = sentence.split()
+    return " ".join(words[:max_words]) + (" ..." if len(words) > max_words else "")
+
+
+def extractive_summary(previous: str, messages: List[Dict[str, str]]) -> str:
+    """Default summarizer: appends the first sentence of every folded message. No API call."""
+    lines = [previous] if previous else []
+    for m in messages:
+        who = "User" if m["role"] == "user" else "Assistant"
+        lines.append(f"{who}: {_first_sentence(m['content'])}")
+    return "\n".join(lines)
+
+
+class ConversationMemory:
+    """
+    Token-budgeted chat memory: the most recent turns verbatim plus a rolling
+    summary of older ones, so the request size stays flat however long the chat.
+
+    `summarizer(previous_summary, folded_messages) -> str` and
+    `token_counter(text) -> int` are pluggable, e.g. an LLM summarizer or a
+    model-specific tokenizer.
+    """
+
+    def __init__(self, max_tokens: int = 1500, summary_tokens: int = 300, min_recent: int = 2,
+                 summarizer: Optional[Callable] = None, token_counter: Optional[Callable[[str], int]] = None):
+        self._max_tokens = max_tokens
+        self._summary_tokens = summary_tokens
+        self._min_recent = min_recent
+        self._summarize = summarizer or extractive_summary
+        self._count = token_counter or count_tokens
+        self._recent: List[Dict[str, str]] = []
+        self._recent_tokens = 0
+        self.summary = ""
+
+    @classmethod
+    def from_history(cls, history: List[Dict[str, str]], **kwargs) -> "ConversationMemory":
+        memory = cls(**kwargs)
+        for m in history:
+            memory.add(m["role"], m["content"])
+        return memory
+
+    def add(self, role: str, content: str) -> None:
+        self._recent.append({"role": role, "content": content})
+        self._recent_tokens += self._count(content)
+        self._compact()
+
+    def _compact(self) -> None:
+        recent_budget = self._max_tokens - self._summary_tokens
+        folded = []
+        while self._recent_tokens > recent_budget and len(self._recent) > self._min_recent:
+            m = self._recent.pop(0)
+            self._recent_tokens -= self._count(m["content"])
+            folded.append(m)
+        if not folded:
+            return
+
+        summary = self._summarize(self.summary, folded)
+        # Rolling: the oldest summary lines go first once the summary is over budget.
+        lines = summary.split("\n")
+        while len(lines) > 1 and self._count("\n".join(lines)) > self._summary_tokens:
+            lines.pop(0)
+        self.summary = "\n".join(lines)
+
+    def messages(self) -> List[Dict[str, str]]:
+        """The history to send: the summary (as a system message) followed by the recent turns."""
+        out = []
+        if self.summary:
+            out.append({"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"})
+        return out + [dict(m) for m in self._recent]
+
+    def clear(self) -> None:
+        self._recent, self._recent_tokens, self.summary = [], 0, ""
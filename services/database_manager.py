@@ -1,41 +1,48 @@
-import sqlite3
-from typing import Any, Iterable
+from typing import Any, Iterable, NamedTuple
+
+from database.pool import ConnectionPool, get_pool
+
+class QueryResult(NamedTuple):
+    """What execute_query reports; the cursor's connection is back in the pool by then."""
+    rowcount: int
+    lastrowid: int | None
 
 class DatabaseManager:
 
     def __init__(self, db_path: str):
         self._db_path = db_path
-        self._connection: sqlite3.Connection | None = None
+        self._pool: ConnectionPool | None = None
 
     def connect(self) -> None:
-        if self._connection is None:
-            self._connection = sqlite3.connect(self._db_path)
+        if self._pool is None:
+            self._pool = get_pool(self._db_path)
 
     def close(self) -> None:
-        if self._connection is not None:
-            self._connection.close()
-            self._connection = None
+        # Connections belong to the shared pool; just drop the reference.
+        self._pool = None
 
-    def execute_query(self, sql: str, params: Iterable[Any] = ()):
+    def execute_query(self, sql: str, params: Iterable[Any] = ()) -> QueryResult:
         """Execute a query (INSERT, UPDATE, DELETE)."""
-        if self._connection is None:
+        if self._pool is None:
             self.connect()
-        cur = self._connection.cursor()
-        cur.execute(sql, tuple(params))
-        self._connection.commit()
-        return cur
+        with self._pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(sql, tuple(params))
+            conn.commit()
+            return QueryResult(cur.rowcount, cur.lastrowid)
 
     def fetch_one(self, sql: str, params: Iterable[Any] = ()):
-        if self._connection is None:
-            self._connection = sqlite3.connect(self._db_path, check_same_thread=False)
-        cur = self._connection.cursor()
-        cur.execute(sql, tuple(params))
-        return cur.fetchone()
+        if self._pool is None:
+            self.connect()
+        with self._pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(sql, tuple(params))
+            return cur.fetchone()
 
     def fetch_all(self, sql: str, params: Iterable[Any] = ()):
-        if self._connection is None:
+        if self._pool is None:
             self.connect()
-        cur = self._connection.cursor()
-        cur.execute(sql, tuple(params))
-        return cur.fetchall()
-    
\ No newline at end of file
+        with self._pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(sql, tuple(params))
+            return cur.fetchall()
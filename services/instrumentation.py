@@ -0,0 +1,304 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from services.database_manager import QueryResult
+
+# Opt-in: APP_PROFILE=1 streamlit run main.py. Off, nothing is wrapped and every
+# hook below returns immediately.
+ENABLED = os.environ.get("APP_PROFILE", "").lower() not in ("", "0", "false", "no")
+LOG_PATH = os.environ.get("APP_PROFILE_LOG") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs", "profile.log"
+)
+EXPORT_INTERVAL = 60.0   # seconds between percentile snapshots appended to LOG_PATH
+WINDOW = 1000            # samples kept per metric
+MAX_EVENTS = 500         # calls kept per rerun for the panel
+
+# Helpers wrapped in database.db; nested calls (e.g. read_sql under fetch_all) show up indented.
+DB_HELPERS = (
+    "read_sql", "fetch_all", "fetch_unified", "count_by", "count_by_department", "count_tickets",
+    "weekly_counts", "oldest_open", "fetch_by_id", "find_ids", "fetch_page", "search",
+    "add_entry", "update_entry", "delete_entry",
+    "save_chat_message", "flush_chat_messages", "get_chat_history", "delete_chat_history",
+)
+
+
+def percentile(ordered, pct: float) -> Optional[float]:
+    """Nearest-rank percentile of already sorted samples; None when there are none."""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+class Rerun:
+    """Calls made by one Streamlit rerun of one page."""
+
+    def __init__(self, page: str):
+        self.page = page
+        self.started = time.perf_counter()
+        self.wall: Optional[float] = None
+        self.events: List[dict] = []
+        self.phases: Dict[str, float] = {}
+        self.stack: List[dict] = []  # calls still running, innermost last
+
+    def begin(self, kind: str, nested: bool = True) -> dict:
+        """Opens a call; it is listed where it started, so nested calls follow their caller."""
+        parent = self.stack[-1] if self.stack else None
+        event = {"kind": kind, "name": kind, "ms": None, "rows": None, "depth": len(self.stack), "child": 0.0, "parent": parent}
+        if len(self.events) < MAX_EVENTS:
+            self.events.append(event)
+        if nested:
+            self.stack.append(event)
+        return event
+
+    def end(self, event: dict, name: str, seconds: float, rows: Optional[int]):
+        """Closes a call; its time minus its nested calls' counts towards its phase."""
+        if self.stack and self.stack[-1] is event:
+            self.stack.pop()
+        event.update(name=name, ms=seconds * 1000, rows=rows)
+        self.phases[event["kind"]] = self.phases.get(event["kind"], 0.0) + seconds - event["child"]
+        if event["parent"] is not None:
+            event["parent"]["child"] += seconds
+
+    def phase_table(self) -> Dict[str, float]:
+        """Wall time per phase in seconds; `other` is Python, pandas and Streamlit outside any wrapped call."""
+        wall = self.wall if self.wall is not None else time.perf_counter() - self.started
+        phases = dict(self.phases)
+        phases["other"] = max(0.0, wall - sum(phases.values()))
+        return phases
+
+
+class Stats:
+    """Rolling samples per (kind, name), shared by every session in the process."""
+
+    def __init__(self, window: int = WINDOW):
+        self._window = window
+        self._samples: Dict[tuple, deque] = {}
+        self._calls: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, name: str, seconds: float):
+        key = (kind, name)
+        with self._lock:
+            if key not in self._samples:
+                self._samples[key] = deque(maxlen=self._window)
+                self._calls[key] = 0
+            self._samples[key].append(seconds)
+            self._calls[key] += 1
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            items = [(key, sorted(samples), self._calls[key]) for key, samples in self._samples.items()]
+        return [
+            {
+                "kind": kind, "name": name, "calls": calls,
+                "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+                "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+                "max_ms": round(ordered[-1] * 1000, 3),
+            }
+            for (kind, name), ordered, calls in sorted(items)
+        ]
+
+
+stats = Stats()
+_local = threading.local()
+_installed = False
+_install_lock = threading.Lock()
+_last_export = time.monotonic()
+
+
+def current() -> Optional[Rerun]:
+    return getattr(_local, "rerun", None)
+
+
+def _rows(result) -> Optional[int]:
+    """Rows in a helper's result: frames, row lists, fetch_page's (frame, cursor), execute_query results, single rows."""
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], pd.DataFrame):
+        result = result[0]
+    if isinstance(result, (pd.DataFrame, list)):
+        return len(result)
+    if isinstance(result, QueryResult):
+        return result.rowcount
+    if isinstance(result, (dict, tuple)):
+        return 1
+    return None
+
+
+def _label(fn_name: str, args) -> str:
+    if args and isinstance(args[0], str):
+        arg = " ".join(args[0].split())
+        return f"{fn_name}({arg[:100]})"
+    return fn_name
+
+
+def timed(kind: str, name: Optional[str] = None, label: Callable = _label):
+    """Decorator timing each call of a function as `kind`; returns the function unchanged when disabled."""
+    def wrap(fn):
+        if not ENABLED:
+            return fn
+        fn_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            rerun = current()
+            event = rerun.begin(kind) if rerun is not None else None
+            start = time.perf_counter()
+            result = None
+            try:
+                result = fn(*args, **kwargs)
+                return result
+            finally:
+                seconds = time.perf_counter() - start
+                call = label(fn_name, args)
+                stats.add(kind, call, seconds)
+                if event is not None:
+                    rerun.end(event, call, seconds, _rows(result))
+
+        inner.__wrapped_for_profile__ = True
+        return inner
+    return wrap
+
+
+def _wrap_stream(original):
+    """Times an LLM stream from the call to its last chunk, and the first chunk separately."""
+    @functools.wraps(original)
+    def stream(self, model, *args, **kwargs):
+        rerun = current()
+        # Not pushed on the stack: the reader runs its own code between chunks.
+        event = rerun.begin("llm", nested=False) if rerun is not None else None
+        start = time.perf_counter()
+        first, chunks = None, 0
+        inner = original(self, model, *args, **kwargs)
+        try:
+            for chunk in inner:
+                if first is None:
+                    first = time.perf_counter() - start
+                chunks += 1
+                yield chunk
+        finally:
+            inner.close()
+            seconds = time.perf_counter() - start
+            if first is not None:
+                stats.add("llm", f"first_token({model})", first)
+            stats.add("llm", f"stream({model})", seconds)
+            if event is not None:
+                rerun.end(event, f"stream({model})", seconds, chunks)
+    return stream
+
+
+def _wrap_methods(cls, kind: str, names, label=_label):
+    for attr in names:
+        method = getattr(cls, attr)
+        if not getattr(method, "__wrapped_for_profile__", False):
+            setattr(cls, attr, timed(kind, attr, label)(method))
+
+
+def install():
+    """Wraps the db helpers, DatabaseManager, the LLM client and st.altair_chart. Idempotent."""
+    global _installed
+    if not ENABLED:
+        return
+    with _install_lock:
+        if _installed:
+            return
+        import streamlit as st
+
+        import database.db as db
+        from database import analytics
+        from services import llm_client
+        from services.database_manager import DatabaseManager
+
+        for attr in DB_HELPERS:
+            fn = getattr(db, attr)
+            if not getattr(fn, "__wrapped_for_profile__", False):
+                setattr(db, attr, timed("db", attr)(fn))
+        analytics.query = timed("db", "duckdb")(analytics.query)
+        _wrap_methods(DatabaseManager, "sql", ("execute_query", "fetch_one", "fetch_all"),
+                      label=lambda fn_name, args: _label(fn_name, args[1:]))
+
+        llm_client.LLMClient.stream = _wrap_stream(llm_client.LLMClient.stream)
+        _wrap_methods(llm_client.LLMClient, "llm", ("complete",), label=lambda fn_name, args: f"{fn_name}({args[1]})")
+
+        # Chart specs are serialized when handed to Streamlit.
+        st.altair_chart = timed("altair", "altair_chart", label=lambda fn_name, args: fn_name)(st.altair_chart)
+
+        atexit.register(export)
+        _installed = True
+
+
+def start_rerun(page: str) -> Optional[Rerun]:
+    """Begins recording the current rerun of `page`; call at the top of the script."""
+    if not ENABLED:
+        return None
+    install()
+    _local.rerun = Rerun(page)
+    return _local.rerun
+
+
+def finish_rerun() -> Optional[Rerun]:
+    """Stops recording, folds the rerun into the rolling stats and exports them when due."""
+    global _last_export
+    rerun = current()
+    if rerun is None:
+        return None
+    _local.rerun = None
+    rerun.wall = time.perf_counter() - rerun.started
+    stats.add("rerun", rerun.page, rerun.wall)
+    for phase, seconds in rerun.phase_table().items():
+        stats.add("phase", f"{rerun.page}:{phase}", seconds)
+
+    if time.monotonic() - _last_export >= EXPORT_INTERVAL:
+        _last_export = time.monotonic()
+        export()
+    return rerun
+
+
+def export(path: str = LOG_PATH) -> Optional[str]:
+    """Appends the current percentiles as one JSON line to `path`."""
+    snapshot = stats.snapshot()
+    if not snapshot:
+        return None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a") as f:
+            f.write(json.dumps({"time": time.strftime("%Y-%m-%d %H:%M:%S"), "pid": os.getpid(), "metrics": snapshot}) + "\n")
+    except OSError as e:
+        print(f"[WARNING] Could not write profile log {path}: {e}")
+        return None
+    return path
+
+
+def render_panel():
+    """Ends the rerun and, for admins, shows where its time went in a collapsed sidebar panel."""
+    rerun = finish_rerun()
+    if rerun is None:
+        return
+    import streamlit as st
+
+    user = st.session_state.get("user")
+    if not hasattr(user, "get_role") or user.get_role() != "admin":
+        return
+
+    with st.sidebar.expander("Performance", expanded=False):
+        st.caption(f"{rerun.page}: {rerun.wall * 1000:.0f} ms, {len(rerun.events)} instrumented calls")
+        phases = rerun.phase_table()
+        st.dataframe(pd.DataFrame(
+            [{"phase": k, "ms": round(v * 1000, 1), "share": f"{v / rerun.wall:.0%}" if rerun.wall else "-"} for k, v in phases.items()]
+        ), hide_index=True)
+        if rerun.events:
+            events = pd.DataFrame(rerun.events, columns=["kind", "name", "ms", "rows", "depth"])
+            events["name"] = ["  " * d + n for d, n in zip(events["depth"], events["name"])]
+            events["ms"] = events["ms"].astype(float).round(2)
+            events["rows"] = events["rows"].astype("Int64")
+            st.dataframe(events[["kind", "name", "ms", "rows"]], hide_index=True)
+        if st.toggle("Percentiles since start", key="profile_percentiles"):
+            st.dataframe(pd.DataFrame(stats.snapshot()), hide_index=True)
+        if st.button("Export to log", key="profile_export"):
+            st.caption(f"Written to {export()}")
@@ -0,0 +1,223 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Iterable, Iterator, Optional
+
+from database.pool import get_pool
+from services.llm_client import LLMError
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database", "llm_cache.db")
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+DEFAULT_MAX_ENTRIES = 2000
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Case, spacing and trailing punctuation don't change the question."""
+    return " ".join(prompt.lower().split()).rstrip("?!. ")
+
+
+def make_key(model: str, prompt: str, context: str) -> str:
+    context_hash = hashlib.sha256(context.encode()).hexdigest()
+    return hashlib.sha256(f"{model}\0{normalize_prompt(prompt)}\0{context_hash}".encode()).hexdigest()
+
+
+def replay(text: str) -> Iterator[str]:
+    """Yields a cached answer word by word, so it renders like a live stream."""
+    start = 0
+    while start < len(text):
+        end = text.find(" ", start + 1)
+        end = len(text) if end == -1 else end
+        yield text[start:end]
+        start = end
+
+
+class ResponseCache:
+    """Persistent LLM answers keyed by (model, normalized prompt, context hash), with TTL and LRU eviction."""
+
+    def __init__(self, db_path: str = CACHE_PATH, ttl_seconds: int = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self._pool = get_pool(db_path)
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        with self._pool.connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, model TEXT, response TEXT, "
+                "created REAL, expires REAL, last_used REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)")
+            conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._pool.connection() as conn:
+            res = conn.execute("SELECT response, expires FROM responses WHERE key = ?", (key,)).fetchone()
+            if res is None:
+                return None
+            if res[1] < now:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            conn.commit()
+            return res[0]
+
+    def put(self, key: str, model: str, response: str) -> None:
+        now = time.time()
+        with self._pool.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, now, now + self._ttl, now)
+            )
+            conn.execute("DELETE FROM responses WHERE expires < ?", (now,))
+            conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self._max_entries,)
+            )
+            conn.commit()
+
+    def clear(self) -> None:
+        with self._pool.connection() as conn:
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+
+class _Flight:
+    """One upstream call in progress; followers read its chunks as they arrive."""
+
+    def __init__(self):
+        self.chunks = []
+        self.followers = 0
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._cond = threading.Condition()
+
+    def add(self, chunk: str) -> None:
+        with self._cond:
+            self.chunks.append(chunk)
+            self._cond.notify_all()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        with self._cond:
+            self.done = True
+            self.error = error
+            self._cond.notify_all()
+
+    def follow(self) -> Iterator[str]:
+        i = 0
+        while True:
+            with self._cond:
+                while i >= len(self.chunks) and not self.done:
+                    self._cond.wait()
+                pending = self.chunks[i:]
+                done, error = self.done, self.error
+            yield from pending
+            i += len(pending)
+            if done and i >= len(self.chunks):
+                if error is not None:
+                    raise error
+                return
+
+
+class RequestCoalescer:
+    """Identical in-flight requests share one upstream call."""
+
+    def __init__(self):
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def stream(self, key: str, produce: Callable[[], Iterable[str]], on_complete: Callable[[str], None] = None) -> Iterator[str]:
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                flight.followers += 1
+
+        if not leader:
+            yield from flight.follow()
+            return
+
+        chunks = iter(produce())
+        try:
+            for chunk in chunks:
+                flight.add(chunk)
+                yield chunk
+        except GeneratorExit:
+            # The leader's reader stopped early (e.g. a rerun). Anyone following
+            # still gets the full answer: the call finishes in the background.
+            with self._lock:
+                handed_off = flight.followers > 0
+                if not handed_off:
+                    self._inflight.pop(key, None)
+            if handed_off:
+                threading.Thread(target=self._drain, args=(key, flight, chunks, on_complete), daemon=True).start()
+            else:
+                getattr(chunks, "close", lambda: None)()
+                flight.finish(LLMError("The request was abandoned."))
+            raise
+        except BaseException as e:
+            self._finish(key, flight, e if isinstance(e, Exception) else LLMError("The request was abandoned."))
+            raise
+        self._complete(key, flight, on_complete)
+
+    def _drain(self, key: str, flight: _Flight, chunks: Iterator[str], on_complete) -> None:
+        try:
+            for chunk in chunks:
+                flight.add(chunk)
+        except Exception as e:
+            self._finish(key, flight, e)
+            return
+        self._complete(key, flight, on_complete)
+
+    def _complete(self, key: str, flight: _Flight, on_complete) -> None:
+        try:
+            if on_complete:
+                on_complete("".join(flight.chunks))
+        finally:
+            self._finish(key, flight)
+
+    def _finish(self, key: str, flight: _Flight, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+        flight.finish(error)
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+coalescer = RequestCoalescer()
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
+
+
+def cached_stream(model: str, prompt: str, context: str, produce: Callable[[], Iterable[str]]) -> Iterator[str]:
+    """
+    Streams an answer from the cache when one exists, otherwise from produce(),
+    coalescing identical concurrent requests and caching the finished answer.
+    """
+    cache = get_response_cache()
+    key = make_key(model, prompt, context)
+    hit = cache.get(key)
+    if hit is not None:
+        yield from replay(hit)
+        return
+
+    def store(text):
+        try:
+            cache.put(key, model, text)
+        except Exception as e:  # a cache failure should never cost the user their answer
+            print(f"LLM cache write failed: {e}")
+
+    yield from coalescer.stream(key, produce, on_complete=store)
+
+
+def cached_completion(model: str, prompt: str, context: str, produce: Callable[[], str]) -> str:
+    """Non-streaming form of cached_stream."""
+    return "".join(cached_stream(model, prompt, context, lambda: [produce()]))
@@ -0,0 +1,250 @@
+import asyncio
+import queue
+import random
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+import openai
+from openai import AsyncOpenAI
+
+from services.instrumentation import percentile
+
+# Process-wide limits, shared by every session and every client.
+MAX_CONCURRENCY = 8          # upstream requests in flight
+RATE_PER_SECOND = 3.0        # sustained request rate
+BURST = 10                   # requests allowed back to back
+QUEUE_TIMEOUT = 20.0         # longest a request waits for a slot before giving up
+REQUEST_DEADLINE = 90.0      # whole request, retries included
+FIRST_TOKEN_TIMEOUT = 30.0
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 20.0
+
+
+class LLMError(Exception):
+    """The assistant could not answer; the message is safe to show to the user."""
+
+
+class LLMBusyError(LLMError):
+    pass
+
+
+class TokenBucket:
+    """Async token bucket: `rate` requests per second with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+def _retryable(error: Exception) -> bool:
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError)):  # includes timeouts
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _user_error(error: Exception) -> LLMError:
+    """The LLMError shown for a failed call, once retrying is over."""
+    if isinstance(error, (asyncio.TimeoutError, openai.APITimeoutError)):
+        return LLMError("The assistant took too long to answer.")
+    if isinstance(error, openai.RateLimitError) or (isinstance(error, openai.APIStatusError) and error.status_code >= 500):
+        return LLMBusyError("The assistant is busy right now. Please try again in a moment.")
+    if isinstance(error, openai.APIConnectionError):
+        return LLMError("The assistant can't be reached right now. Please try again later.")
+    return LLMError("The assistant could not answer this request.")
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    return max(delay, retry_after or 0)
+
+
+class LLMMetrics:
+    """Rolling latency samples and counters for the assistant calls."""
+
+    def __init__(self, window: int = 500):
+        self.first_token: deque = deque(maxlen=window)
+        self.total: deque = deque(maxlen=window)
+        self.requests = 0
+        self.retries = 0
+        self.rejected = 0
+        self.failed = 0
+        self.in_flight = 0
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        first_token, total = sorted(self.first_token), sorted(self.total)
+        return {
+            "requests": self.requests, "retries": self.retries, "rejected": self.rejected,
+            "failed": self.failed, "in_flight": self.in_flight,
+            "first_token_p50": percentile(first_token, 50),
+            "first_token_p95": percentile(first_token, 95),
+            "total_p50": percentile(total, 50),
+            "total_p95": percentile(total, 95),
+        }
+
+
+metrics = LLMMetrics()
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+_limits = None
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """One background event loop per process; Streamlit script threads hand it work."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-client", daemon=True).start()
+        return _loop
+
+
+def _get_limits():
+    # Created on the loop thread, where the asyncio primitives are used.
+    global _limits
+    if _limits is None:
+        _limits = (asyncio.Semaphore(MAX_CONCURRENCY), TokenBucket(RATE_PER_SECOND, BURST))
+    return _limits
+
+
+class LLMClient:
+    """
+    Shared chat-completions client: a global concurrency limit, token-bucket rate
+    limiting, jittered exponential backoff on 429/5xx, per-request deadlines and
+    first-token latency metrics. Use stream()/complete() from synchronous code.
+    """
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None):
+        self._api_key = api_key
+        self._base_url = base_url
+        self._client: Optional[AsyncOpenAI] = None
+
+    def _async_client(self) -> AsyncOpenAI:
+        if self._client is None:
+            # Retries and timeouts are handled here, not by the SDK.
+            self._client = AsyncOpenAI(api_key=self._api_key, base_url=self._base_url, max_retries=0, timeout=REQUEST_DEADLINE)
+        return self._client
+
+    async def astream(self, model: str, messages: List[Dict[str, str]], deadline: float = REQUEST_DEADLINE) -> AsyncIterator[str]:
+        semaphore, bucket = _get_limits()
+        started = time.monotonic()
+        expires = started + deadline
+
+        try:
+            await asyncio.wait_for(semaphore.acquire(), QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            metrics.rejected += 1
+            raise LLMBusyError("The assistant is busy right now. Please try again in a moment.")
+
+        metrics.requests += 1
+        metrics.in_flight += 1
+        try:
+            attempt = 0
+            while True:
+                await bucket.acquire()
+                received = False
+                try:
+                    stream = await asyncio.wait_for(
+                        self._async_client().chat.completions.create(model=model, messages=messages, stream=True),
+                        max(0.1, min(FIRST_TOKEN_TIMEOUT, expires - time.monotonic()))
+                    )
+                    iterator = stream.__aiter__()
+                    while True:
+                        remaining = expires - time.monotonic()
+                        if remaining <= 0:
+                            raise LLMError("The assistant took too long to answer.")
+                        timeout = remaining if received else min(remaining, FIRST_TOKEN_TIMEOUT)
+                        try:
+                            chunk = await asyncio.wait_for(iterator.__anext__(), timeout)
+                        except StopAsyncIteration:
+                            break
+                        if chunk.choices and chunk.choices[0].delta.content is not None:
+                            if not received:
+                                received = True
+                                metrics.first_token.append(time.monotonic() - started)
+                            yield chunk.choices[0].delta.content
+                    metrics.total.append(time.monotonic() - started)
+                    return
+                except (asyncio.TimeoutError, openai.OpenAIError) as e:
+                    # A half-streamed answer can't be replayed, so only retry before the first token.
+                    retryable = isinstance(e, asyncio.TimeoutError) or _retryable(e)
+                    delay = backoff_delay(attempt, _retry_after(e))
+                    if received or not retryable or attempt >= MAX_RETRIES or time.monotonic() + delay >= expires:
+                        metrics.failed += 1
+                        raise _user_error(e) from e
+                    attempt += 1
+                    metrics.retries += 1
+                    await asyncio.sleep(delay)
+        finally:
+            metrics.in_flight -= 1
+            semaphore.release()
+
+    async def acomplete(self, model: str, messages: List[Dict[str, str]], deadline: float = REQUEST_DEADLINE) -> str:
+        return "".join([chunk async for chunk in self.astream(model, messages, deadline)])
+
+    def stream(self, model: str, messages: List[Dict[str, str]], deadline: float = REQUEST_DEADLINE) -> Iterator[str]:
+        """Synchronous view of astream(); the request runs on the shared background loop."""
+        chunks: queue.Queue = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for chunk in self.astream(model, messages, deadline):
+                    chunks.put(chunk)
+                chunks.put(done)
+            except BaseException as e:
+                chunks.put(e)
+                raise
+
+        future = asyncio.run_coroutine_threadsafe(pump(), _get_loop())
+        try:
+            while True:
+                item = chunks.get()
+                if item is done:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            future.cancel()  # no-op when finished; stops the upstream call if the reader gave up
+
+    def complete(self, model: str, messages: List[Dict[str, str]], deadline: float = REQUEST_DEADLINE) -> str:
+        return "".join(self.stream(model, messages, deadline))
+
+
+_clients: Dict[tuple, LLMClient] = {}
+
+
+def get_client(api_key: str, base_url: Optional[str] = None) -> LLMClient:
+    """The process-wide client for this key and endpoint."""
+    key = (api_key, base_url)
+    with _loop_lock:
+        if key not in _clients:
+            _clients[key] = LLMClient(api_key, base_url)
+        return _clients[key]